@@ -56,7 +56,9 @@ INSTALLED_APPS = [
     "annotation.apps.AnnotationConfig",
     "userprofile.apps.UserprofileConfig",
     "evaluation.apps.EvaluationConfig",
-    "comparison.apps.ComparisonConfig"
+    "comparison.apps.ComparisonConfig",
+    "upload.apps.UploadConfig",
+    "converter.apps.ConverterConfig"
 ]
 
 REST_FRAMEWORK = {
@@ -190,6 +192,28 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# File processing
+# Number of worker processes used to parse or convert several uploaded files at once
+
+FILE_PROCESSING_WORKERS = int(os.environ.get('FILE_PROCESSING_WORKERS', os.cpu_count() or 1))
+
+# Upload sessions
+# Hours after its last change that a chunked upload which was never used is removed
+
+UPLOAD_SESSION_EXPIRY_HOURS = int(os.environ.get('UPLOAD_SESSION_EXPIRY_HOURS', 24))
+
+# Export cache
+# Rendered exports are kept on disk and evicted least recently used first once the directory exceeds the size.
+# Kept outside MEDIA_ROOT so cached exports are never reachable through the media URL
+
+EXPORT_CACHE_DIR = os.environ.get('EXPORT_CACHE_DIR', os.path.join(BASE_DIR, 'private', 'export_cache'))
+EXPORT_CACHE_MAX_SIZE = int(os.environ.get('EXPORT_CACHE_MAX_SIZE', 1024 * 1024 * 1024))
+
+# Export jobs
+# Hours a file rendered by a background export stays available for download
+
+EXPORT_JOB_EXPIRY_HOURS = int(os.environ.get('EXPORT_JOB_EXPIRY_HOURS', 24))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
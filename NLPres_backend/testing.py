@@ -0,0 +1,37 @@
+import os
+import tempfile
+
+from django.test import TestCase, override_settings
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from enums.ProjectCategory import ProjectCategory
+from project.models import Project, Collaborator
+from userprofile.models import CustomUser
+
+
+class ProjectTestCase(TestCase):
+    """
+    A project owned by an authenticated API client, with the media and export cache directories
+    redirected to a temporary directory for the duration of each test.
+    """
+
+    category = ProjectCategory.CLASSIFICATION
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=os.path.join(directory.name, 'media'),
+                                            EXPORT_CACHE_DIR=os.path.join(directory.name, 'export_cache')))
+
+        self.user = self.create_user('owner@example.com')
+        self.project = Project.objects.create(title='Project', description='Project', category=self.category.value)
+        Collaborator.objects.create(project=self.project, user=self.user, role='owner', joined_at=now())
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_user(self, email):
+        return CustomUser.objects.create(username=email, email=email)
+
+    def project_url(self, path):
+        return f'/api/project/{self.project.id}/{path}'
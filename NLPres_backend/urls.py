@@ -42,6 +42,8 @@ urlpatterns = [
 
     path('api/converter/', include('converter.urls')),
 
+    path('api/upload/', include('upload.urls')),
+
     path('api/project/<int:project_id>/comparison/', include('comparison.urls')),
 
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
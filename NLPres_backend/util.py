@@ -1,3 +1,5 @@
+from itertools import islice
+
 from document.models import Document
 
 
@@ -24,4 +26,9 @@ def compute_ratings_matrix(categories, data):
     for item in data:
         counts = [item.count(category) for category in categories]
         ratings_matrix.append(counts)
-    return ratings_matrix
\ No newline at end of file
+    return ratings_matrix
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
@@ -1,3 +1,4 @@
+from django.db.models.functions import Length
 from rest_framework import serializers
 from rest_framework.generics import get_object_or_404
 
@@ -5,6 +6,7 @@ from document.models import Annotation, Document
 from label.models import Label
 from label.serializers import LabelSerializer
 from userprofile.serializers import UserSerializer
+from utility.TokenAligner import TokenAligner
 
 
 class AnnotationSerializer(serializers.ModelSerializer):
@@ -21,6 +23,29 @@ class AnnotationSerializer(serializers.ModelSerializer):
         model = Annotation
         fields = '__all__'
 
+    def validate(self, attrs):
+        start, end = attrs.get('start'), attrs.get('end')
+        if self.instance is not None or start is None or end is None:
+            return attrs
+
+        # Checked against the stored token offsets, the document text is not loaded
+        token_offsets, length = get_object_or_404(
+            Document.objects.values_list('token_offsets', Length('text')), pk=attrs.get('document_id')
+        )
+        if start < 0 or end < start or end > length:
+            raise serializers.ValidationError({'end': 'Span is out of bounds of the document text.'})
+
+        if token_offsets is None:
+            # Documents saved before the offsets were stored, computed from the text like Document.offsets
+            text = Document.objects.values_list('text', flat=True).get(pk=attrs.get('document_id'))
+            token_offsets = TokenAligner.pack_offsets(text)
+
+        offsets = TokenAligner.unpack_offsets(token_offsets)
+        if not TokenAligner.count_tokens(offsets, start, end + 1 if start == end else end):
+            raise serializers.ValidationError({'start': 'Span does not cover any token.'})
+
+        return attrs
+
     def create(self, validated_data):
         label = get_object_or_404(Label, pk=validated_data['label_id'])
         document = get_object_or_404(Document, pk=validated_data['document_id'])
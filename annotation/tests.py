@@ -1,3 +1,46 @@
-from django.test import TestCase
+from NLPres_backend.testing import ProjectTestCase
+from document.models import Document, Annotation
+from enums.ProjectCategory import ProjectCategory
+from label.models import Label
 
-# Create your tests here.
+
+class AnnotationSpanTest(ProjectTestCase):
+    category = ProjectCategory.SEQUENTIAL
+
+    def setUp(self):
+        super().setUp()
+        self.label = Label.objects.create(name='PER', color='#000000', project=self.project)
+        self.document = Document.objects.create(project=self.project, text='John  lives in Paris')
+
+    def annotate(self, start, end):
+        return self.client.post(self.project_url('annotation/create'),
+                                {'label_id': self.label.id, 'document_id': self.document.id,
+                                 'start': start, 'end': end}, format='json')
+
+    def test_span_covering_tokens_is_created(self):
+        self.assertEqual(self.annotate(0, 4).status_code, 201)
+        self.assertEqual(self.annotate(15, 20).status_code, 201)
+        self.assertEqual(Annotation.objects.filter(document=self.document).count(), 2)
+
+    def test_out_of_bounds_span_is_rejected(self):
+        for start, end in ((-1, 4), (15, 21), (5, 3)):
+            response = self.annotate(start, end)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('end', response.data)
+
+    def test_whitespace_only_span_is_rejected(self):
+        response = self.annotate(4, 6)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('start', response.data)
+
+    def test_single_character_span(self):
+        # start == end covers the character at start, as in the exports
+        self.assertEqual(self.annotate(0, 0).status_code, 201)
+        self.assertEqual(self.annotate(4, 4).status_code, 400)
+
+    def test_document_without_stored_offsets(self):
+        Document.objects.filter(pk=self.document.pk).update(token_offsets=None)
+
+        self.assertEqual(self.annotate(0, 4).status_code, 201)
+        self.assertEqual(self.annotate(4, 6).status_code, 400)
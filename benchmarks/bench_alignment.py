@@ -0,0 +1,109 @@
+"""
+Compares the span-to-token alignment used by the exports with the loop it replaced.
+
+    python -m benchmarks.bench_alignment [--documents 20000] [--words 40]
+"""
+import argparse
+import random
+import time
+
+from utility.TokenAligner import TokenAligner
+
+
+def create_token(idx, word, token_label):
+    token = {
+        "id": idx,
+        "form": word,
+        "lemma": word.lower(),
+        "upostag": token_label,
+        "xpostag": "_",
+        "feats": "_",
+        "head": 0,
+        "deprel": "_",
+        "deps": "_",
+        "misc": "_"
+    }
+    return idx + 1, token
+
+
+def add_tokens(idx, tokens, segment, token_label="_"):
+    for word in segment.split():
+        idx, token = create_token(idx, word, token_label)
+        tokens.append(token)
+    return idx, tokens
+
+
+def legacy_align(text, labels):
+    # The loop previously copied into the exports and the sequential evaluation
+    tokens = []
+    idx = 0
+    prev_end = -1
+
+    for start, end, label_name in sorted(labels, key=lambda x: (x[0], x[1])):
+        if start != (prev_end + 1):
+            segment = text[prev_end + 1: start]
+            prev_end = start - 1
+            idx, tokens = add_tokens(idx, tokens, segment)
+
+        word = text[start:end + 1] if (start == end) else text[start:end]
+        prev_end = end
+        idx, token = create_token(idx, word, label_name)
+        tokens.append(token)
+
+    if prev_end != len(text) - 1:
+        segment = text[prev_end + 1: len(text)]
+        idx, tokens = add_tokens(idx, tokens, segment)
+
+    return [token["form"] for token in tokens], [token["upostag"] for token in tokens]
+
+
+def create_documents(count, words, seed=0):
+    rng = random.Random(seed)
+    vocabulary = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta"]
+    documents = []
+    for _ in range(count):
+        text = " ".join(rng.choice(vocabulary) for _ in range(words))
+        labels = []
+        position = 0
+        for word in text.split(" "):
+            if rng.random() < 0.2:
+                labels.append([position, position + len(word), rng.choice(["PER", "LOC", "ORG"])])
+            position += len(word) + 1
+        documents.append((text, labels))
+    return documents
+
+
+def measure(function, documents):
+    started = time.perf_counter()
+    results = [function(text, labels) for text, labels in documents]
+    return time.perf_counter() - started, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--documents', type=int, default=20000)
+    parser.add_argument('--words', type=int, default=40)
+    options = parser.parse_args()
+
+    documents = create_documents(options.documents, options.words)
+    aligner = TokenAligner()
+
+    def aligned(text, labels):
+        forms, label_ids = aligner.align(text, labels)
+        return forms, aligner.labels(label_ids)
+
+    legacy_time, legacy_results = measure(legacy_align, documents)
+    aligner_time, aligner_results = measure(aligned, documents)
+
+    if legacy_results != aligner_results:
+        raise SystemExit("TokenAligner output differs from the legacy loop")
+
+    tokens = sum(len(forms) for forms, _ in legacy_results)
+    print(f"{options.documents} documents, {tokens} tokens")
+    print(f"legacy loop   {legacy_time:8.3f}s  {tokens / legacy_time:12.0f} tokens/s")
+    print(f"TokenAligner  {aligner_time:8.3f}s  {tokens / aligner_time:12.0f} tokens/s")
+    print(f"speedup       {legacy_time / aligner_time:8.2f}x")
+
+
+if __name__ == '__main__':
+    main()
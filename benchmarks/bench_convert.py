@@ -0,0 +1,92 @@
+"""
+Compares the materialized converter path (read_<format> + to_<format>) with the pipelined
+FileProcessor.convert_file on a generated input file.
+
+    python -m benchmarks.bench_convert [--records 50000] [--pairs jsonl:json json:jsonl conllu:jsonl]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from utility.FileProcessor import FileProcessor
+
+
+def create_input(path, file_format, records):
+    with open(path, 'w', encoding='utf-8') as file:
+        if file_format == 'jsonl':
+            for i in range(records):
+                file.write(f'{{"text": "document {i} with a few words of text", "label": "label{i % 5}"}}\n')
+        elif file_format == 'json':
+            file.write("[\n")
+            file.write(",\n".join(
+                f'{{"text": "document {i} with a few words of text", "label": "label{i % 5}"}}' for i in range(records)
+            ))
+            file.write("\n]")
+        elif file_format == 'conllu':
+            for i in range(records):
+                words = f"document {i} with words".split()
+                file.write(f"# text = {' '.join(words)}\n")
+                for idx, word in enumerate(words, start=1):
+                    file.write(f"{idx}\t{word}\t{word}\t_\t_\t_\t0\t_\t_\t_\n")
+                file.write("\n")
+        else:
+            raise ValueError(f"No generator for {file_format}")
+
+
+def materialized(processor, path, file_format, export_as):
+    with open(path, 'rb') as file:
+        content = getattr(processor, f"read_{file_format}")(file)
+    yield processor.convert(content, export_as)
+
+
+def pipelined(processor, path, file_format, export_as):
+    with open(path, 'rb') as file:
+        yield from processor.convert_file(file, file_format, export_as)
+
+
+def measure(chunks):
+    started = time.perf_counter()
+    first_byte = None
+    size = 0
+    for chunk in chunks:
+        if first_byte is None:
+            first_byte = time.perf_counter() - started
+        size += len(chunk)
+    return first_byte, time.perf_counter() - started, size
+
+
+def measure_peak(chunks):
+    # Separate run, tracing allocations slows everything down too much to time it at the same time
+    tracemalloc.start()
+    for _ in chunks:
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--records', type=int, default=50000)
+    parser.add_argument('--pairs', nargs='+', default=['jsonl:json', 'json:jsonl', 'conllu:jsonl'])
+    options = parser.parse_args()
+
+    processor = FileProcessor()
+    with tempfile.TemporaryDirectory() as directory:
+        for pair in options.pairs:
+            file_format, export_as = pair.split(':')
+            path = os.path.join(directory, f"input.{file_format}")
+            create_input(path, file_format, options.records)
+            print(f"{file_format} -> {export_as}, {options.records} records, {os.path.getsize(path)} bytes")
+
+            for name, function in (('materialized', materialized), ('pipelined', pipelined)):
+                first_byte, elapsed, size = measure(function(processor, path, file_format, export_as))
+                peak = measure_peak(function(processor, path, file_format, export_as))
+                print(f"  {name:<13} first byte {first_byte:7.3f}s  total {elapsed:7.3f}s  "
+                      f"peak {peak / 1024 / 1024:8.1f} MB  output {size} bytes")
+
+
+if __name__ == '__main__':
+    main()
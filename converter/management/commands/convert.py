@@ -0,0 +1,102 @@
+import glob
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from utility.AtomicFile import AtomicFile
+from utility.FileProcessor import FileProcessor
+
+FORMATS = ['json', 'jsonl', 'csv', 'conllu']
+
+
+class Command(BaseCommand):
+    help = "Convert a directory or glob of files from one format to another, without going through the API"
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help="Input directory (searched recursively) or glob pattern")
+        parser.add_argument('--from', dest='file_format', choices=FORMATS, required=True)
+        parser.add_argument('--to', dest='export_as', choices=FORMATS, required=True)
+        parser.add_argument('--workers', type=int, default=settings.FILE_PROCESSING_WORKERS)
+        parser.add_argument('--output-dir', help="Write here instead of alongside the inputs, keeping relative paths")
+
+    def handle(self, *args, **options):
+        file_format = options['file_format']
+        export_as = options['export_as']
+        if file_format == export_as:
+            raise CommandError("--from and --to must be different formats")
+
+        paths = self.find_files(options['source'], file_format)
+        if not paths:
+            raise CommandError(f"No .{file_format} files found in {options['source']}")
+
+        tasks = [(path, self.output_path(path, options['source'], options['output_dir'], export_as))
+                 for path in paths]
+
+        started = time.perf_counter()
+        converted = 0
+        bytes_read = 0
+        bytes_written = 0
+        errors = []
+        for path, read, written, error in self.run(tasks, file_format, export_as, options['workers']):
+            if error:
+                errors.append((path, error))
+                self.stderr.write(f"{path}: {error}")
+                continue
+            converted += 1
+            bytes_read += read
+            bytes_written += written
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"Converted {converted}/{len(tasks)} file(s) in {elapsed:.2f}s, "
+            f"{converted / elapsed:.1f} files/s, {bytes_read / 1024 / 1024 / elapsed:.1f} MB/s read, "
+            f"{bytes_read} bytes in, {bytes_written} bytes out"
+        )
+        if errors:
+            raise CommandError(f"{len(errors)} file(s) failed to convert")
+
+    def find_files(self, source, file_format):
+        if os.path.isdir(source):
+            paths = (os.path.join(root, name) for root, _, names in os.walk(source) for name in names)
+            return sorted(path for path in paths if path.endswith(f".{file_format}"))
+        return sorted(path for path in glob.glob(source, recursive=True) if os.path.isfile(path))
+
+    def output_path(self, path, source, output_dir, export_as):
+        name = f"{os.path.splitext(path)[0]}.{export_as}"
+        if not output_dir:
+            return name
+
+        # Glob inputs are placed relative to the fixed part of the pattern
+        base = source if os.path.isdir(source) else os.path.dirname(re.split(r'[*?\[]', source, maxsplit=1)[0])
+        return os.path.join(output_dir, os.path.relpath(name, base or '.'))
+
+    def run(self, tasks, file_format, export_as, workers):
+        if workers <= 1 or len(tasks) == 1:
+            for path, output_path in tasks:
+                yield convert_path(path, output_path, file_format, export_as)
+            return
+
+        # Workers only need FileProcessor, but spawn them like FileWorkerPool so nothing is inherited
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = [executor.submit(convert_path, path, output_path, file_format, export_as)
+                       for path, output_path in tasks]
+            for future in as_completed(futures):
+                yield future.result()
+
+
+def convert_path(path, output_path, file_format, export_as):
+    try:
+        written = 0
+        with open(path, 'rb') as file, AtomicFile(output_path) as output:
+            for chunk in FileProcessor().convert_file(file, file_format, export_as):
+                output.write(chunk)
+                written += len(chunk)
+        return path, os.path.getsize(path), written, None
+    except Exception as e:
+        return path, 0, 0, str(e)
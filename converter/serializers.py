@@ -1,44 +1,98 @@
+import os
+import shutil
+import tempfile
 import zipfile
-from io import BytesIO
 from rest_framework import serializers
+from upload.serializers import UploadSessionFileField, merge_uploads, consume_uploads
 from utility.FileProcessor import FileProcessor
+from utility.FileWorkerPool import FileWorkerPool
 
 
 class ConverterSerializer(serializers.Serializer, FileProcessor):
     files = serializers.ListField(
         child=serializers.FileField(),
+        required=False,
     )
+    uploads = serializers.ListField(child=UploadSessionFileField(), required=False)
     file_format = serializers.ChoiceField(choices=['json', 'jsonl', 'csv', 'conllu'])
     export_as = serializers.ChoiceField(choices=['json', 'jsonl', 'csv', 'conllu'])
 
+    # Archives up to this size stay in memory, larger ones roll over to a temporary file
+    spool_size = 16 * 1024 * 1024
+
+    def validate(self, attrs):
+        return merge_uploads(attrs)
+
     def save(self):
         files = self.validated_data['files']
         file_format = self.validated_data['file_format']
         export_as = self.validated_data['export_as']
 
-        file_reader = getattr(self, f"read_{file_format}", None)
+        file_reader = getattr(self, f"iter_{file_format}", None)
         if not callable(file_reader):
             raise serializers.ValidationError(f"No reader available for file format: {file_format}")
 
-        return self.process_files(files, export_as, file_reader)
+        with consume_uploads(files):
+            return self.process_files(files, file_format, export_as)
+
+
+    def process_files(self, files, file_format, export_as):
+        pool = FileWorkerPool()
+        archive = tempfile.SpooledTemporaryFile(max_size=self.spool_size)
+        try:
+            with zipfile.ZipFile(archive, 'w') as zip_file:
+                if pool.is_parallel(files):
+                    self.write_parallel(zip_file, pool, files, file_format, export_as)
+                else:
+                    for file in files:
+                        try:
+                            # Write the member chunk by chunk as the converter produces it
+                            with zip_file.open(self.converted_name(file.name, export_as), 'w',
+                                               force_zip64=True) as member:
+                                self.write_converted(file, file_format, export_as, member)
+                        except Exception as e:
+                            raise serializers.ValidationError(f"{file.name}: {str(e)}")
+        except BaseException:
+            archive.close()
+            raise
 
+        archive.seek(0)
+        return archive, 'application/zip'
 
-    def process_files(self, files, export_as, file_reader):
-        zip_buffer = BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w') as zip_file:
-            for file in files:
-                try:
-                    content = file_reader(file)
-                    converted_content = self.convert(content, export_as)
-                    filename = f"{file.name.split('.')[0]}.{export_as}"
-                    zip_file.writestr(filename, converted_content)
-                except Exception as e:
-                    raise serializers.ValidationError(f"{file.name}: {str(e)}")
-        zip_buffer.seek(0)
-        return zip_buffer, 'application/zip'
+    def write_parallel(self, zip_file, pool, files, file_format, export_as):
+        # Workers convert into temporary files, which are copied into the archive in upload order
+        failure = None
+        for name, path, error in pool.map(convert_upload, files, file_format, export_as):
+            if path is None:
+                failure = failure or f"{name}: {error}"
+                continue
 
+            try:
+                if failure is None:
+                    with open(path, 'rb') as converted, \
+                            zip_file.open(self.converted_name(name, export_as), 'w', force_zip64=True) as member:
+                        shutil.copyfileobj(converted, member, 1024 * 1024)
+            finally:
+                os.remove(path)
 
+        if failure:
+            raise serializers.ValidationError(failure)
 
+    def converted_name(self, name, export_as):
+        return f"{name.split('.')[0]}.{export_as}"
 
+    def write_converted(self, file, file_format, export_as, output):
+        for chunk in self.convert_file(file, file_format, export_as):
+            output.write(chunk)
 
 
+def convert_upload(name, source, file_format, export_as):
+    serializer = ConverterSerializer()
+    output = tempfile.NamedTemporaryFile(suffix=f".{export_as}", delete=False)
+    try:
+        with output, FileWorkerPool.open(name, source) as file:
+            serializer.write_converted(file, file_format, export_as, output)
+        return name, output.name, None
+    except Exception as e:
+        os.remove(output.name)
+        return name, None, str(e)
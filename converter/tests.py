@@ -1,3 +1,93 @@
-from django.test import TestCase
+import io
+import zipfile
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+
+from NLPres_backend.testing import ProjectTestCase
+from converter.serializers import ConverterSerializer
+from utility.FileProcessor import FileProcessor
+from utility.FileWorkerPool import FileWorkerPool
+
+
+class ConverterTestCase(ProjectTestCase):
+    files = {
+        'reviews.jsonl': b'{"text": "great", "label": "positive"}\n{"text": "poor", "label": "negative"}\n',
+        'more.jsonl': b'{"text": "fine", "label": "neutral"}\n',
+    }
+
+    def convert(self, files, export_as='csv'):
+        uploads = [SimpleUploadedFile(name, content) for name, content in files.items()]
+        return self.client.post('/api/converter/convert',
+                                {'files': uploads, 'file_format': 'jsonl', 'export_as': export_as},
+                                format='multipart')
+
+    def members(self, response):
+        with zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content))) as archive:
+            return {name: archive.read(name) for name in archive.namelist()}
+
+    def expected(self, files, export_as='csv'):
+        processor = FileProcessor()
+        return {f"{name.split('.')[0]}.{export_as}": processor.convert(processor.read_jsonl(io.BytesIO(content)),
+                                                                       export_as)
+                for name, content in files.items()}
+
+
+class ConverterArchiveTest(ConverterTestCase):
+
+    def test_every_file_becomes_an_archive_member(self):
+        response = self.convert(self.files)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="converted_files.zip"')
+        self.assertEqual(self.members(response), self.expected(self.files))
+
+    def test_large_archive_rolls_over_to_disk(self):
+        files = {'large.jsonl': b''.join(b'{"text": "review %d"}\n' % i for i in range(20000))}
+        serializer = ConverterSerializer(data={'files': [SimpleUploadedFile(name, content)
+                                                         for name, content in files.items()],
+                                               'file_format': 'jsonl', 'export_as': 'jsonl'})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+        with mock.patch.object(ConverterSerializer, 'spool_size', 64 * 1024):
+            archive, _ = serializer.save()
+
+        with archive:
+            self.assertTrue(archive._rolled)
+            with zipfile.ZipFile(archive) as zip_file:
+                self.assertEqual(zip_file.read('large.jsonl'), self.expected(files, 'jsonl')['large.jsonl'])
+
+    def test_failed_file_is_reported_by_name(self):
+        response = self.convert({**self.files, 'broken.jsonl': b'{"text": "ok"}\n{not json\n'})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('broken.jsonl: ', response.data[0])
+
+
+@override_settings(FILE_PROCESSING_WORKERS=2)
+@mock.patch.object(FileWorkerPool, 'min_total_size', 0)
+class ParallelConverterTest(ConverterTestCase):
+
+    def test_members_match_the_serial_conversion_in_upload_order(self):
+        files = {f'shard{i}.jsonl': b'{"text": "review %d"}\n' % i for i in range(4)}
+        self.assertTrue(FileWorkerPool().is_parallel([SimpleUploadedFile(name, content)
+                                                      for name, content in files.items()]))
+
+        response = self.convert(files)
+
+        self.assertEqual(response.status_code, 200)
+        members = self.members(response)
+        self.assertEqual(list(members), [f'shard{i}.csv' for i in range(4)])
+        self.assertEqual(members, self.expected(files))
+
+    def test_failed_file_is_reported_like_the_serial_path(self):
+        files = {**self.files, 'broken.jsonl': b'{not json\n'}
+        response = self.convert(files)
+
+        with self.settings(FILE_PROCESSING_WORKERS=1):
+            serial = self.convert(files)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, serial.data)
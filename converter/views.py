@@ -1,4 +1,4 @@
-from django.http import HttpResponse
+from django.http import FileResponse
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
@@ -8,12 +8,10 @@ from converter.serializers import ConverterSerializer
 
 @api_view(['POST'])
 def convert_file(request):
-    serializer = ConverterSerializer(data=request.data)
+    serializer = ConverterSerializer(data=request.data, context={'request': request})
     if serializer.is_valid():
-        zip_buffer, content_type = serializer.save()
-        response = HttpResponse(zip_buffer, content_type=content_type)
-        response['Content-Disposition'] = 'attachment; filename="converted_files.zip"'
-        return response
+        archive, content_type = serializer.save()
+        return FileResponse(archive, as_attachment=True, filename="converted_files.zip", content_type=content_type)
 
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
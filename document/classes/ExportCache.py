@@ -0,0 +1,81 @@
+import hashlib
+import os
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from document.models import Document, Annotation
+from label.models import Label
+from utility.AtomicFile import AtomicFile
+
+
+class ExportCache:
+    """
+    Rendered exports stored on disk under a key derived from the export options and the project data version.
+    Any change to the documents, annotations or labels of the project changes the key, so entries never go stale.
+    Reads refresh the file mtime, and eviction removes the least recently used files first.
+    """
+
+    # Bump when the output of the exporters changes so older artifacts are not served
+    format_version = 1
+
+    def __init__(self, directory=None, max_size=None):
+        self.directory = directory or settings.EXPORT_CACHE_DIR
+        self.max_size = settings.EXPORT_CACHE_MAX_SIZE if max_size is None else max_size
+
+    @staticmethod
+    def data_version(project):
+        # Counts catch deletions, the latest updated_at catches edits and additions
+        documents = Document.objects.filter(project=project).aggregate(count=Count('id'), updated=Max('updated_at'))
+        annotations = Annotation.objects.filter(document__project=project) \
+            .aggregate(count=Count('id'), updated=Max('updated_at'))
+        labels = Label.objects.filter(project=project).aggregate(count=Count('id'), updated=Max('updated_at'))
+        return [
+            [values['count'], values['updated'].isoformat() if values['updated'] else None]
+            for values in (documents, annotations, labels)
+        ]
+
+    def key(self, project, user, **options):
+        version = [self.format_version, project.id, user.id, sorted(options.items()), self.data_version(project)]
+        return hashlib.sha256(repr(version).encode('utf-8')).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key)
+
+    def open(self, key):
+        try:
+            file = open(self.path(key), 'rb')
+        except FileNotFoundError:
+            return None
+
+        # An entry evicted after opening can still be read through the open handle
+        try:
+            os.utime(self.path(key))
+        except FileNotFoundError:
+            pass
+        return file
+
+    def tee(self, key, chunks):
+        # Write the stream to a temporary file while it is sent, it only becomes an entry once complete
+        with AtomicFile(self.path(key)) as file:
+            for chunk in chunks:
+                file.write(chunk)
+                yield chunk
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.startswith('.'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
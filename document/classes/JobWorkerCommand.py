@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+
+class JobWorkerCommand(BaseCommand):
+    """
+    Management command that polls a BackgroundJob model and runs the claimed jobs one at a time.
+    Subclasses set job_model and implement run_job.
+    """
+
+    job_model = None
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Exit once the queue is empty")
+        parser.add_argument('--interval', type=float, default=2.0, help="Seconds between polls of an empty queue")
+
+    def handle(self, *args, **options):
+        while True:
+            self.before_poll()
+            job = self.job_model.claim_next()
+            if job:
+                self.run_job(job)
+                continue
+
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+
+    def before_poll(self):
+        pass
+
+    def run_job(self, job):
+        raise NotImplementedError
@@ -0,0 +1,111 @@
+from collections import defaultdict
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+
+from document.models import Document, DocumentSignature, SignatureBucket
+from utility.MinHash import MinHash
+
+
+class NearDuplicateIndex:
+    """
+    LSH index of MinHash signatures stored per project.
+    Documents sharing at least one band bucket are candidates, their estimated Jaccard similarity decides the match.
+    """
+
+    # Upper bound of candidates compared per document, keeps the stage linear on heavily repeated boilerplate
+    max_candidates = 100
+    # Documents stored (and fetched) per bucket, the first ones represent a bucket shared by boilerplate text
+    max_bucket_documents = 20
+
+    def __init__(self, project, threshold=0.8, minhash=None):
+        self.project = project
+        self.threshold = threshold
+        self.minhash = minhash or MinHash()
+
+    def sign(self, document):
+        document.minhash_signature = self.minhash.signature(document.text)
+        document.minhash_buckets = self.minhash.buckets(document.minhash_signature)
+
+    def match(self, documents):
+        for document in documents:
+            self.sign(document)
+
+        keys = {key for document in documents for key in document.minhash_buckets}
+        bucket_documents = defaultdict(list)
+        # At most max_bucket_documents rows per bucket, so a batch never fetches O(project) rows
+        rows = SignatureBucket.objects.filter(project=self.project, bucket__in=keys).annotate(
+            position=Window(RowNumber(), partition_by=[F('bucket')], order_by=F('id').asc())
+        ).filter(position__lte=self.max_bucket_documents).values_list('bucket', 'document_id')
+        for key, document_id in rows:
+            bucket_documents[key].append(Document(pk=document_id))
+
+        signatures = {
+            document_id: np.frombuffer(bytes(signature), dtype=np.uint32)
+            for document_id, signature in DocumentSignature.objects.filter(
+                document_id__in={candidate.pk for candidates in bucket_documents.values() for candidate in candidates}
+            ).values_list('document_id', 'signature')
+        }
+
+        # Documents of this batch are matched against the stored ones and the earlier ones of the same batch
+        matches = []
+        for document in documents:
+            match = self.best_match(document, bucket_documents, signatures)
+            matches.append(match)
+            if match is None:
+                for key in document.minhash_buckets:
+                    bucket_documents[key].append(document)
+
+        return matches
+
+    def best_match(self, document, bucket_documents, signatures):
+        best, best_similarity = None, self.threshold
+        seen = set()
+
+        for key in document.minhash_buckets:
+            for candidate in bucket_documents.get(key, ()):
+                # Stored candidates are known by primary key, documents of this batch are not saved yet
+                candidate_key = candidate.pk or id(candidate)
+                if candidate_key in seen or len(seen) >= self.max_candidates:
+                    continue
+                seen.add(candidate_key)
+
+                signature = signatures.get(candidate.pk) if candidate.pk else candidate.minhash_signature
+                if signature is None:
+                    continue
+
+                similarity = self.minhash.similarity(document.minhash_signature, signature)
+                if similarity >= best_similarity:
+                    best, best_similarity = candidate, similarity
+
+        return best
+
+    def add(self, documents):
+        DocumentSignature.objects.bulk_create([
+            DocumentSignature(document=document, signature=document.minhash_signature.tobytes())
+            for document in documents
+        ])
+
+        # Full buckets are skipped, the document is still found through its other bands
+        keys = {key for document in documents for key in document.minhash_buckets}
+        sizes = dict(SignatureBucket.objects.filter(project=self.project, bucket__in=keys)
+                     .values('bucket').annotate(size=Count('id')).values_list('bucket', 'size'))
+        buckets = []
+        for document in documents:
+            for key in document.minhash_buckets:
+                if sizes.get(key, 0) < self.max_bucket_documents:
+                    sizes[key] = sizes.get(key, 0) + 1
+                    buckets.append(SignatureBucket(project=self.project, document=document, bucket=key))
+        SignatureBucket.objects.bulk_create(buckets)
+
+    def reindex(self, document):
+        # Called after the text of a document changed, documents that were never indexed stay out of the index
+        with transaction.atomic():
+            deleted, _ = DocumentSignature.objects.filter(document=document).delete()
+            if not deleted:
+                return
+            SignatureBucket.objects.filter(document=document).delete()
+            self.sign(document)
+            self.add([document])
@@ -0,0 +1,57 @@
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils.timezone import now
+from rest_framework.exceptions import ValidationError
+
+from document.classes.JobWorkerCommand import JobWorkerCommand
+from document.models import ExportJob
+from document.serializers import ExportDocumentSerializer
+from enums.JobStatus import JobStatus
+from utility.AtomicFile import AtomicFile
+
+
+class Command(JobWorkerCommand):
+    help = "Run queued document export jobs and remove expired export files"
+    job_model = ExportJob
+
+    def before_poll(self):
+        if removed := ExportJob.remove_expired():
+            self.stdout.write(f"Removed {removed} expired export file(s)")
+
+    def run_job(self, job):
+        self.stdout.write(f"Export job {job.id}: started")
+        serializer = ExportDocumentSerializer(data=job.options,
+                                              context={'project_id': job.project_id, 'export_job': job})
+        try:
+            serializer.is_valid(raise_exception=True)
+            content, _ = serializer.save()
+
+            # Random prefix, the media directory is publicly served and job ids are sequential
+            name = f"exports/{uuid.uuid4().hex}_{serializer.get_filename()}"
+            with AtomicFile(default_storage.path(name)) as file:
+                for chunk in content:
+                    file.write(chunk)
+                    job.bytes_written += len(chunk)
+
+            job.filename = serializer.get_filename()
+            job.path = name
+            job.expires_at = now() + timedelta(hours=settings.EXPORT_JOB_EXPIRY_HOURS)
+            job.status = JobStatus.COMPLETED.value
+
+        except ValidationError as e:
+            job.errors.append({"job": e.detail})
+            job.status = JobStatus.FAILED.value
+
+        except Exception as e:
+            job.errors.append({"job": str(e)})
+            job.status = JobStatus.FAILED.value
+
+        job.finished_at = now()
+        job.save()
+        self.stdout.write(
+            f"Export job {job.id}: {job.status}, {job.documents_exported}/{job.total_documents} documents, "
+            f"{job.bytes_written} bytes"
+        )
@@ -0,0 +1,53 @@
+from django.core.files.storage import default_storage
+from django.utils.timezone import now
+
+from document.classes.JobWorkerCommand import JobWorkerCommand
+from document.models import ImportJob
+from document.serializers import ImportDocumentSerializer
+from enums.JobStatus import JobStatus
+from upload.models import UploadSession
+
+
+class Command(JobWorkerCommand):
+    help = "Run queued document import jobs and remove expired upload sessions"
+    job_model = ImportJob
+
+    def before_poll(self):
+        if removed := UploadSession.remove_expired():
+            self.stdout.write(f"Removed {removed} expired upload session(s)")
+
+    def run_job(self, job):
+        self.stdout.write(f"Import job {job.id}: started")
+        files = []
+        try:
+            for stored_file in job.files:
+                file = default_storage.open(stored_file['path'])
+                file.name = stored_file['name']
+                files.append(file)
+
+            serializer = ImportDocumentSerializer(context={'project_id': job.project_id, 'import_job': job})
+            result = serializer.create({
+                'files': files,
+                'file_format': job.file_format,
+                'key': job.key,
+                **job.options,
+            })
+            job.errors = result['errors']
+            job.status = JobStatus.COMPLETED.value
+
+        except Exception as e:
+            job.errors.append({"job": str(e)})
+            job.status = JobStatus.FAILED.value
+
+        finally:
+            for file in files:
+                file.close()
+            for stored_file in job.files:
+                default_storage.delete(stored_file['path'])
+
+        job.finished_at = now()
+        job.save()
+        self.stdout.write(
+            f"Import job {job.id}: {job.status}, {job.rows_inserted}/{job.rows_parsed} rows inserted, "
+            f"{job.rows_skipped} duplicate(s) skipped ({job.throughput} rows/s)"
+        )
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.1 on 2026-10-18 13:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('document', '0006_alter_document_options'),
+        ('project', '0007_remove_collaborator_invitation_token'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_format', models.CharField(max_length=10)),
+                ('key', models.CharField(blank=True, max_length=100, null=True)),
+                ('files', models.JSONField(default=list)),
+                ('status', models.CharField(choices=[('pending', 'PENDING'), ('running', 'RUNNING'), ('completed', 'COMPLETED'), ('failed', 'FAILED')], default='pending', max_length=20)),
+                ('rows_parsed', models.PositiveBigIntegerField(default=0)),
+                ('rows_inserted', models.PositiveBigIntegerField(default=0)),
+                ('errors', models.JSONField(default=list)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='project.project')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'import_jobs',
+                'ordering': ['created_at', 'id'],
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.1.1 on 2026-10-18 13:40
+
+import hashlib
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def hash_existing_documents(apps, schema_editor):
+    Document = apps.get_model('document', 'Document')
+    project_id = None
+    seen = set()
+    batch = []
+
+    # Duplicates that already exist keep an empty hash so that the unique constraint can be added
+    documents = Document.objects.order_by('project_id', 'id').only('id', 'project_id', 'text')
+    for document in documents.iterator(chunk_size=2000):
+        if document.project_id != project_id:
+            project_id = document.project_id
+            seen = set()
+
+        content_hash = hashlib.sha256(document.text.encode('utf-8')).hexdigest()
+        if content_hash in seen:
+            continue
+        seen.add(content_hash)
+        document.content_hash = content_hash
+        batch.append(document)
+
+        if len(batch) >= 2000:
+            Document.objects.bulk_update(batch, ['content_hash'])
+            batch = []
+
+    Document.objects.bulk_update(batch, ['content_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('document', '0007_importjob'),
+        ('project', '0007_remove_collaborator_invitation_token'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(hash_existing_documents, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='importjob',
+            name='rows_skipped',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddConstraint(
+            model_name='document',
+            constraint=models.UniqueConstraint(fields=('project', 'content_hash'), name='unique_document_content_hash'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.1 on 2026-10-18 13:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('document', '0008_document_content_hash'),
+        ('project', '0007_remove_collaborator_invitation_token'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSignature',
+            fields=[
+                ('document', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='signature', serialize=False, to='document.document')),
+                ('signature', models.BinaryField()),
+            ],
+            options={
+                'db_table': 'document_signatures',
+            },
+        ),
+        migrations.AddField(
+            model_name='document',
+            name='near_duplicate_of',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='near_duplicates', to='document.document'),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='options',
+            field=models.JSONField(default=dict),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='rows_near_duplicate',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='SignatureBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.BigIntegerField()),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='document.document')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='project.project')),
+            ],
+            options={
+                'db_table': 'signature_buckets',
+                'indexes': [models.Index(fields=['project', 'bucket'], name='signature_b_project_2dcad5_idx')],
+            },
+        ),
+    ]
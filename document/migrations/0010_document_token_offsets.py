@@ -0,0 +1,44 @@
+# Generated by Django 5.1.1 on 2026-10-18 13:52
+
+import re
+import sys
+from array import array
+from itertools import chain
+
+from django.db import migrations, models
+
+
+def compute_token_offsets(apps, schema_editor):
+    Document = apps.get_model('document', 'Document')
+    batch = []
+
+    # Little-endian int32 (start, end) pairs of the whitespace tokens, as TokenAligner.pack_offsets
+    documents = Document.objects.filter(token_offsets__isnull=True).only('id', 'text')
+    for document in documents.iterator(chunk_size=2000):
+        offsets = array('i', chain.from_iterable(match.span() for match in re.finditer(r'\S+', document.text)))
+        if sys.byteorder == 'big':
+            offsets.byteswap()
+        document.token_offsets = offsets.tobytes()
+        batch.append(document)
+
+        if len(batch) >= 2000:
+            Document.objects.bulk_update(batch, ['token_offsets'])
+            batch = []
+
+    Document.objects.bulk_update(batch, ['token_offsets'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('document', '0009_near_duplicates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='document',
+            name='token_offsets',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.RunPython(compute_token_offsets, migrations.RunPython.noop),
+    ]
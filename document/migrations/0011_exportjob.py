@@ -0,0 +1,43 @@
+# Generated by Django 5.1.1 on 2026-10-18 13:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('document', '0010_document_token_offsets'),
+        ('project', '0007_remove_collaborator_invitation_token'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('options', models.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('pending', 'PENDING'), ('running', 'RUNNING'), ('completed', 'COMPLETED'), ('failed', 'FAILED')], default='pending', max_length=20)),
+                ('errors', models.JSONField(default=list)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('total_documents', models.PositiveBigIntegerField(default=0)),
+                ('documents_exported', models.PositiveBigIntegerField(default=0)),
+                ('bytes_written', models.PositiveBigIntegerField(default=0)),
+                ('filename', models.CharField(blank=True, max_length=100)),
+                ('path', models.CharField(blank=True, max_length=255)),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='project.project')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'export_jobs',
+                'ordering': ['created_at', 'id'],
+                'abstract': False,
+            },
+        ),
+    ]
@@ -1,13 +1,23 @@
-from django.db import models
+import hashlib
+
+from django.core.files.storage import default_storage
+from django.db import models, transaction
+from django.utils.timezone import now
 
 from NLPres_backend import settings
+from enums.JobStatus import JobStatus
 from label.models import Label
 from project.models import Project
+from utility.TokenAligner import TokenAligner
 
 
 class Document(models.Model):
     text = models.TextField()
+    content_hash = models.CharField(max_length=64, null=True, blank=True, editable=False)
+    token_offsets = models.BinaryField(null=True, blank=True, editable=False)
     project = models.ForeignKey(Project, on_delete=models.CASCADE)
+    near_duplicate_of = models.ForeignKey('self', null=True, blank=True, on_delete=models.SET_NULL,
+                                          related_name='near_duplicates')
     users = models.ManyToManyField(settings.AUTH_USER_MODEL,through='Annotation')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -15,6 +25,44 @@ class Document(models.Model):
     class Meta:
         db_table = 'documents'
         ordering = ['created_at','id']
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'content_hash'], name='unique_document_content_hash'),
+        ]
+
+    @staticmethod
+    def hash_text(text):
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    @property
+    def offsets(self):
+        if self.token_offsets is None:
+            self.token_offsets = TokenAligner.pack_offsets(self.text)
+        return TokenAligner.unpack_offsets(self.token_offsets)
+
+    def save(self, *args, **kwargs):
+        self.content_hash = self.hash_text(self.text)
+        self.token_offsets = TokenAligner.pack_offsets(self.text)
+        super().save(*args, **kwargs)
+
+class DocumentSignature(models.Model):
+    document = models.OneToOneField(Document, on_delete=models.CASCADE, primary_key=True, related_name='signature')
+    signature = models.BinaryField()
+
+    class Meta:
+        db_table = 'document_signatures'
+
+
+class SignatureBucket(models.Model):
+    project = models.ForeignKey(Project, on_delete=models.CASCADE)
+    document = models.ForeignKey(Document, on_delete=models.CASCADE)
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        db_table = 'signature_buckets'
+        indexes = [
+            models.Index(fields=['project', 'bucket']),
+        ]
+
 
 class Annotation(models.Model):
     document = models.ForeignKey(Document, on_delete=models.CASCADE)
@@ -26,4 +74,77 @@ class Annotation(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
-        db_table = 'annotations'
\ No newline at end of file
+        db_table = 'annotations'
+
+
+class BackgroundJob(models.Model):
+    project = models.ForeignKey(Project, on_delete=models.CASCADE)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    options = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=JobStatus.choices(), default=JobStatus.PENDING.value)
+    errors = models.JSONField(default=list)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        abstract = True
+        ordering = ['created_at', 'id']
+
+    @classmethod
+    def claim_next(cls):
+        # Lock the oldest pending job so that several workers never pick the same one
+        with transaction.atomic():
+            job = cls.objects.select_for_update(skip_locked=True).filter(status=JobStatus.PENDING.value).first()
+            if job:
+                job.status = JobStatus.RUNNING.value
+                job.started_at = now()
+                job.save(update_fields=['status', 'started_at', 'updated_at'])
+        return job
+
+
+class ImportJob(BackgroundJob):
+    file_format = models.CharField(max_length=10)
+    key = models.CharField(max_length=100, null=True, blank=True)
+    files = models.JSONField(default=list)
+    rows_parsed = models.PositiveBigIntegerField(default=0)
+    rows_inserted = models.PositiveBigIntegerField(default=0)
+    rows_skipped = models.PositiveBigIntegerField(default=0)
+    rows_near_duplicate = models.PositiveBigIntegerField(default=0)
+
+    class Meta(BackgroundJob.Meta):
+        db_table = 'import_jobs'
+
+    @property
+    def throughput(self):
+        if not self.started_at:
+            return 0.0
+        elapsed = ((self.finished_at or now()) - self.started_at).total_seconds()
+        return round(self.rows_parsed / elapsed, 2) if elapsed > 0 else 0.0
+
+
+class ExportJob(BackgroundJob):
+    total_documents = models.PositiveBigIntegerField(default=0)
+    documents_exported = models.PositiveBigIntegerField(default=0)
+    bytes_written = models.PositiveBigIntegerField(default=0)
+    filename = models.CharField(max_length=100, blank=True)
+    path = models.CharField(max_length=255, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta(BackgroundJob.Meta):
+        db_table = 'export_jobs'
+
+    @property
+    def is_expired(self):
+        return self.expires_at is not None and self.expires_at <= now()
+
+    @classmethod
+    def remove_expired(cls):
+        # Delete the rendered files of expired jobs, the job rows are kept for their status
+        jobs = cls.objects.filter(expires_at__lte=now()).exclude(path='')
+        for job in jobs:
+            default_storage.delete(job.path)
+            job.path = ''
+            job.save(update_fields=['path', 'updated_at'])
+        return len(jobs)
@@ -1,13 +1,32 @@
 import csv
 import json
+import os
+import tempfile
+import uuid
+from array import array
+from collections import Counter
+from contextlib import nullcontext
+from functools import partial
+from itertools import chain, groupby
+from operator import itemgetter
 from lib2to3.fixes.fix_input import context
 
+from django.core.files.storage import default_storage
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.db import IntegrityError, transaction, connection
+from django.db.models import Exists, OuterRef, Q, Value
 from django.shortcuts import get_object_or_404
 from rest_framework import serializers
-from document.models import Document, Annotation
+from NLPres_backend.util import batched
+from document.classes.NearDuplicateIndex import NearDuplicateIndex
+from document.models import Document, Annotation, ImportJob, ExportJob
 from enums.ProjectCategory import ProjectCategory
+from label.models import Label
 from label.serializers import LabelSerializer
+from upload.serializers import UploadSessionFileField, merge_uploads, consume_uploads
 from utility.FileProcessor import FileProcessor
+from utility.FileWorkerPool import FileWorkerPool
+from utility.TokenAligner import TokenAligner
 from project.models import Project
 
 class DocumentSerializer(serializers.Serializer):
@@ -20,12 +39,24 @@ class DocumentSerializer(serializers.Serializer):
         fields = '__all__'
 
 
+    def validate_text(self, value):
+        project_id = self.instance.project_id if self.instance else self.context.get('project_id')
+        duplicates = Document.objects.filter(project_id=project_id, content_hash=Document.hash_text(value))
+        if self.instance:
+            duplicates = duplicates.exclude(pk=self.instance.pk)
+        if duplicates.exists():
+            raise serializers.ValidationError("A document with the same text already exists in this project.")
+        return value
+
     def create(self, validated_data):
         return Document.objects.create(**validated_data)
 
     def update(self, instance, validated_data):
+        text_changed = instance.text != validated_data.get('text', instance.text)
         instance.text = validated_data.get('text', instance.text)
         instance.save()
+        if text_changed:
+            NearDuplicateIndex(instance.project).reindex(instance)
         return instance
 
     def get_annotations(self, obj):
@@ -49,154 +80,505 @@ class MyAnnotationSerializer(serializers.ModelSerializer):
         fields = ['id', 'label', 'start', 'end']
 
 class ExportDocumentSerializer(serializers.Serializer, FileProcessor):
-    export_as = serializers.ChoiceField(choices=['json', 'jsonl', 'csv', 'conllu'])
+    export_as = serializers.ChoiceField(choices=['json', 'jsonl', 'csv', 'conllu', 'npz'])
     annotated_only = serializers.BooleanField()
+    compress = serializers.BooleanField(required=False, default=False)
+    background = serializers.BooleanField(required=False, default=False)
+    aggregate = serializers.BooleanField(required=False, default=False)
+
+    chunk_size = 2000
+    progress_interval = 1000
+    label_separator = '|'
+
+    def validate_export_as(self, value):
+        if value == 'npz':
+            project = get_object_or_404(Project, pk=self.context.get('project_id'))
+            if not project.is_category(ProjectCategory.SEQUENTIAL):
+                raise serializers.ValidationError("The npz export is only available for sequential labelling projects.")
+        return value
+
+    def validate_aggregate(self, value):
+        if value:
+            project = get_object_or_404(Project, pk=self.context.get('project_id'))
+            if not project.is_category(ProjectCategory.CLASSIFICATION):
+                raise serializers.ValidationError("Aggregated exports are only available for classification projects.")
+        return value
+
+    @property
+    def user(self):
+        # Export jobs run outside of a request
+        job = self.context.get('export_job')
+        return job.user if job else self.context['request'].user
 
     def save(self):
         export_as = self.validated_data['export_as']
         annotated_only = self.validated_data['annotated_only']
         project = get_object_or_404(Project, pk=self.context.get('project_id'))
-        user = self.context['request'].user
+        user = self.user
         documents = Document.objects.filter(project=project)
-        if annotated_only:
+        if annotated_only and self.validated_data['aggregate']:
+            # Filter without joining annotations so that the aggregates still see every annotator
+            documents = documents.filter(Exists(Annotation.objects.filter(document=OuterRef('pk'), user=user)))
+        elif annotated_only:
             documents = documents.filter(annotation__user=user).distinct()
 
         documents_data = []
         match project.category:
+            case ProjectCategory.CLASSIFICATION.value if self.validated_data['aggregate']:
+                documents_data = self.aggregated_documents(documents, joined=export_as == 'csv')
+
             case ProjectCategory.CLASSIFICATION.value:
-                documents_data = [
+                documents_data = (
                     {'text': document["text"], 'label': document.pop('annotation__label__name')}
-                    for document in documents.values("text", "annotation__label__name")
-                ]
+                    for document in documents.values("text", "annotation__label__name").iterator(
+                        chunk_size=self.chunk_size)
+                )
 
             case ProjectCategory.SEQUENTIAL.value:
-                documents_data = []
-                print(documents)
-                for document in documents:
-                    annotations = Annotation.objects.filter(document=document, user=user)
-                    annotations = sorted(annotations, key=lambda x: (x.start, x.end))
-                    all_label = [
-                        [annotation.start, annotation.end, annotation.label.name] for annotation in annotations
-                    ]
+                annotations = Annotation.objects.filter(document__project=project, user=user) \
+                    .order_by('document_id', 'start', 'end') \
+                    .values_list('document_id', 'start', 'end', 'label__name')
+                documents_data = self.sequential_documents(documents, annotations)
+
+        if job := self.context.get('export_job'):
+            job.total_documents = documents.count()
+            documents_data = self.track_progress(documents_data, job)
+
+        if export_as == 'npz':
+            # Label ids follow the project's label table, 0 is the unlabelled "_"
+            labels = Label.objects.filter(project=project).order_by('id').values_list('name', flat=True)
+            content = self.stream_npz(documents_data, labels)
+        else:
+            sequential = export_as == 'csv' and project.is_category(ProjectCategory.SEQUENTIAL)
+            content = self.stream(documents_data, export_as, sequential=sequential)
+
+        # Pull the first chunk here so an empty export is still reported as a bad request
+        try:
+            first_chunk = next(content)
+        except ValueError as e:
+            raise serializers.ValidationError({"export_as": str(e)})
 
-                    text = document.text
-                    labels = all_label
-                    tokens = []
-                    idx = 0
+        content = chain([first_chunk], content)
+        if self.validated_data['compress']:
+            content = self.gzip_stream(content)
 
-                    prev_end = -1
+        return content, self.get_content_type()
 
-                    for label in labels:
-                        start, end, label_name = label
+    def get_filename(self):
+        filename = f"export_data.{self.validated_data['export_as']}"
+        return f"{filename}.gz" if self.validated_data['compress'] else filename
 
-                        if start != (prev_end + 1):
-                            segment = text[prev_end + 1: start]
-                            prev_end = start - 1
-                            idx, tokens = self.add_tokens(idx, tokens, segment)
+    def get_content_type(self):
+        return 'application/gzip' if self.validated_data['compress'] else 'application/octet-stream'
 
-                        word = text[start:end + 1] if (start == end) else text[start:end]
-                        prev_end = end
-                        idx, token = self.create_token(idx, word, label_name)
-                        tokens.append(token)
+    def cache_key(self, cache):
+        project = get_object_or_404(Project, pk=self.context.get('project_id'))
+        return cache.key(project, self.user, **self.validated_data)
+
+    def create_export_job(self):
+        options = {key: value for key, value in self.validated_data.items() if key != 'background'}
+        job = ExportJob.objects.create(
+            project=get_object_or_404(Project, pk=self.context.get('project_id')),
+            user=self.user,
+            options=options,
+        )
+        return {"job_id": job.id, "status": job.status}
+
+    def track_progress(self, documents_data, job):
+        for count, document in enumerate(documents_data, start=1):
+            job.documents_exported = count
+            yield document
+            if job.documents_exported % self.progress_interval == 0:
+                job.save(update_fields=['total_documents', 'documents_exported', 'bytes_written', 'updated_at'])
+
+    def aggregated_documents(self, documents, joined=False):
+        # One row per document with every annotator's label, the majority label and the share of annotators agreeing
+        documents = documents.order_by('id')
+        if connection.vendor == 'postgresql':
+            rows = documents.annotate(
+                labels=ArrayAgg('annotation__label__name', ordering='annotation__user_id',
+                                filter=Q(annotation__isnull=False), default=Value([])),
+            ).values_list('text', 'labels').iterator(chunk_size=self.chunk_size)
+        else:
+            # Portable fallback, one ordered join grouped here
+            rows = documents.order_by('id', 'annotation__user_id') \
+                .values_list('id', 'text', 'annotation__label__name').iterator(chunk_size=self.chunk_size)
+            groups = (list(group) for _, group in groupby(rows, key=itemgetter(0)))
+            rows = ((group[0][1], [label for _, _, label in group if label is not None]) for group in groups)
+
+        for text, labels in rows:
+            yield self.aggregated_document(text, labels, joined)
+
+    def aggregated_document(self, text, labels, joined=False):
+        votes = sorted(Counter(labels).items(), key=lambda item: (-item[1], item[0]))
+        majority, majority_votes = votes[0] if votes else (None, None)
+        return {
+            'text': text,
+            'label': majority,
+            # CSV keeps a fixed set of columns, the labels go into one cell
+            'labels': self.label_separator.join(labels) if joined else labels,
+            'agreement': round(majority_votes / len(labels), 4) if labels else None,
+        }
+
+    def sequential_documents(self, documents, annotations):
+        # Merge-join the documents with one annotation query, both ordered by document id
+        annotations = annotations.iterator(chunk_size=self.chunk_size)
+        annotation = next(annotations, None)
+        documents = documents.order_by('id').values_list('id', 'text')
+        aligner = TokenAligner()
+
+        for document_id, text in documents.iterator(chunk_size=self.chunk_size):
+            all_label = []
+            while annotation is not None and annotation[0] <= document_id:
+                # Spans left outside an edited text are dropped, the writers would fail halfway through the stream
+                if annotation[0] == document_id and 0 <= annotation[1] <= annotation[2] <= len(text):
+                    all_label.append([annotation[1], annotation[2], annotation[3]])
+                annotation = next(annotations, None)
+
+            forms, label_ids = aligner.align(text, all_label)
+
+            yield {
+                "text": text,
+                "label": all_label,
+                "token": forms,
+                "labels": aligner.labels(label_ids)
+            }
 
-                    if prev_end != len(text) - 1:
-                        segment = text[prev_end + 1: len(text)]
-                        idx, tokens = self.add_tokens(idx, tokens, segment)
 
-                    documents_data.append({
-                        "text": document.text,
-                        "label": all_label,
-                        "token": [token["form"] for token in tokens],
-                        "labels": [token["upostag"] for token in tokens]
-                    })
+class ExportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ExportJob
+        fields = ['id', 'status', 'options', 'total_documents', 'documents_exported', 'bytes_written', 'filename',
+                  'errors', 'created_at', 'started_at', 'finished_at', 'expires_at']
 
 
-        if export_as == 'csv' and project.is_category(ProjectCategory.SEQUENTIAL):
-            return self.convert(documents_data, export_as, sequential=True), 'application/octet-stream'
+class ImportJobSerializer(serializers.ModelSerializer):
+    throughput = serializers.FloatField(read_only=True)
 
-        return self.convert(documents_data, export_as), 'application/octet-stream'
+    class Meta:
+        model = ImportJob
+        fields = ['id', 'status', 'file_format', 'options', 'rows_parsed', 'rows_inserted', 'rows_skipped',
+                  'rows_near_duplicate', 'errors', 'throughput', 'created_at', 'started_at', 'finished_at']
 
 
 class ImportDocumentSerializer(serializers.Serializer, FileProcessor):
     files = serializers.ListField(
         child=serializers.FileField(),
+        required=False,
     )
+    uploads = serializers.ListField(child=UploadSessionFileField(), required=False)
     file_format = serializers.ChoiceField(choices=['txt', 'json', 'jsonl', 'csv', 'conllu'])
     key = serializers.CharField(required=False, allow_null=True)
+    background = serializers.BooleanField(required=False, default=False)
+    near_duplicates = serializers.ChoiceField(choices=['off', 'flag', 'drop'], required=False, default='off')
+    similarity_threshold = serializers.FloatField(required=False, default=0.8, min_value=0.0, max_value=1.0)
+    response_mode = serializers.ChoiceField(choices=['full', 'summary', 'ndjson'], required=False, default='full')
+
+    batch_size = 1000
+    # Tries per batch when a concurrent import inserts one of its texts first
+    insert_attempts = 3
+    max_errors = 100
+    echo_documents = True
+    rows_parsed = 0
+    rows_inserted = 0
+    rows_skipped = 0
+    rows_near_duplicate = 0
+    near_duplicate_mode = 'off'
+    near_duplicate_index = None
+
+    def validate(self, attrs):
+        return merge_uploads(attrs)
 
     def create(self, validated_data):
         files = validated_data['files']
-        file_format = self.validated_data['file_format']
-        key = validated_data['key']
+        file_format = validated_data['file_format']
+        key = validated_data.get('key')
         project = get_object_or_404(Project, id=self.context.get('project_id'))
+        options = {
+            'near_duplicates': validated_data.get('near_duplicates', 'off'),
+            'similarity_threshold': validated_data.get('similarity_threshold', 0.8),
+        }
+
+        if validated_data.get('background'):
+            return self.create_import_job(files, file_format, key, project, options)
+
+        self.near_duplicate_mode = options['near_duplicates']
+        if self.near_duplicate_mode != 'off':
+            self.near_duplicate_index = NearDuplicateIndex(project, options['similarity_threshold'])
 
-        file_reader = getattr(self, f"read_{file_format}", None)
+        file_reader = self.get_file_reader(file_format, key)
         if not callable(file_reader):
             raise serializers.ValidationError(f"No reader available for file format: {file_format}")
 
-        created_documents, file_errors = self.process_files(files, file_reader, key, project)
+        response_mode = validated_data.get('response_mode', 'full')
+        # Background jobs keep every error but never echo the imported documents
+        self.echo_documents = response_mode == 'full' and not self.context.get('import_job')
+        with consume_uploads(files):
+            created_documents, file_errors = self.process_files(files, file_format, key, project)
+
+        match response_mode:
+            case 'summary':
+                return self.summary(files, file_errors)
+            case 'ndjson':
+                return self.stream_document_ids(files, file_errors)
 
         if created_documents:
-            message = f"{len(created_documents)} data imported successfully from {len(files)} file(s)."
             return {
-                "message": message,
-                "objects": [
-                    {"id": doc.id, "text": doc.text} for doc in created_documents
-                ],
+                "message": self.summary_message(files),
+                "objects": created_documents,
+                "duplicates": self.rows_skipped,
+                "near_duplicates": self.rows_near_duplicate,
                 "errors": file_errors
             }
 
-        return {"errors": file_errors}
+        return {"duplicates": self.rows_skipped, "near_duplicates": self.rows_near_duplicate, "errors": file_errors}
+
+    def summary_message(self, files):
+        message = f"{self.rows_inserted} data imported successfully from {len(files)} file(s)."
+        if self.rows_skipped:
+            message += f" {self.rows_skipped} duplicate(s) skipped."
+        if self.rows_near_duplicate:
+            action = "dropped" if self.near_duplicate_mode == 'drop' else "flagged"
+            message += f" {self.rows_near_duplicate} near duplicate(s) {action}."
+        return message
+
+    def summary(self, files, file_errors):
+        return {
+            "message": self.summary_message(files),
+            "imported": self.rows_inserted,
+            "duplicates": self.rows_skipped,
+            "near_duplicates": self.rows_near_duplicate,
+            "first_id": min(self.document_ids, default=None),
+            "last_id": max(self.document_ids, default=None),
+            "error_count": len(file_errors),
+            "errors": file_errors[:self.max_errors],
+        }
+
+    def stream_document_ids(self, files, file_errors):
+        # One id per line, the summary comes last once every id has been sent
+        for document_id in self.document_ids:
+            yield f'{{"id": {document_id}}}\n'.encode('utf-8')
+        yield (json.dumps(self.summary(files, file_errors)) + "\n").encode('utf-8')
 
     def update(self, instance, validated_data):
         return instance
 
-    def process_files(self, files, file_reader, key, project):
+    def create_import_job(self, files, file_format, key, project, options):
+        # Keep the uploads on disk until the import worker picks up the job
+        prefix = uuid.uuid4().hex
+        stored_files = [
+            {"name": file.name, "path": self.store_import_file(f"imports/{prefix}_{file.name}", file)}
+            for file in files
+        ]
+        job = ImportJob.objects.create(
+            project=project,
+            user=self.context['request'].user,
+            file_format=file_format,
+            key=key,
+            options=options,
+            files=stored_files,
+        )
+        return {"job_id": job.id, "status": job.status}
+
+    def store_import_file(self, name, file):
+        session = getattr(file, 'upload_session', None)
+        if session is None:
+            return default_storage.save(name, file)
+
+        # A finalized upload is already on disk, it is moved to the job instead of copied
+        file.close()
+        return session.move(name)
+
+    def get_file_reader(self, file_format, key):
+        if file_format == 'csv':
+            # Keep the imported column as text, e.g. "007" must not become 7
+            return partial(self.iter_csv, converters={key: str.strip})
+        if file_format == 'conllu':
+            # Only the reconstructed sentence text is imported
+            return partial(self.iter_conllu, tokens=False)
+
+        # Prefer the streaming reader so large files are never fully loaded into memory
+        return getattr(self, f"iter_{file_format}", None) or getattr(self, f"read_{file_format}", None)
+
+    def process_files(self, files, file_format, key, project):
         created_documents = []
         file_errors = []
-
-        for file in files:
+        self.document_ids = array('q')
+        self.rows_parsed = 0
+        self.rows_inserted = 0
+        self.rows_skipped = 0
+        self.rows_near_duplicate = 0
+
+        for name, lines, errors in self.read_files(files, file_format, key):
+            # Ids are kept in a compact array, the texts only when the full response echoes them
+            document_ids = array('q')
+            documents = []
+            # Counters from before this file, restored when the file is rolled back
+            counts = (self.rows_inserted, self.rows_skipped, self.rows_near_duplicate)
             try:
-                lines, errors = self.validate_file_content(file, file_reader, key)
-                documents = [Document(project=project, text=line) for line in lines]
-                Document.objects.bulk_create(documents)
-
+                with self.file_transaction():
+                    for batch in batched(lines, self.batch_size):
+                        created = self.insert_documents(project, batch)
+                        document_ids.extend(document.pk for document in created)
+                        if self.echo_documents:
+                            documents.extend({"id": document.pk, "text": document.text} for document in created)
+                        self.report_progress(len(created))
+
+                self.document_ids.extend(document_ids)
                 created_documents.extend(documents)
                 file_errors.extend(errors)
 
             except serializers.ValidationError as e:
-                file_errors.append({file.name: e.detail})
+                self.discard_documents(document_ids, counts)
+                file_errors.append({name: e.detail})
 
+            except (json.JSONDecodeError, csv.Error, Exception) as e:
+                # The whole file is rolled back, so only the reader error is reported
+                self.discard_documents(document_ids, counts)
+                file_errors.append({name: f"{str(e)}"})
+
+        self.report_progress(0)
         return created_documents, file_errors
 
-    def validate_file_content(self, file, file_reader, key):
-        lines = []
-        errors = []
+    def read_files(self, files, file_format, key):
+        pool = FileWorkerPool()
+        if not pool.is_parallel(files):
+            file_reader = self.get_file_reader(file_format, key)
+            for file in files:
+                errors = []
+                yield file.name, self.validate_file_content(file, file_reader, key, errors), errors
+            return
+
+        # Parse and validate the files in worker processes, the inserts still happen here in upload order
+        for name, path, errors, rows_parsed, failure in pool.map(parse_import_file, files, file_format, key):
+            self.rows_parsed += rows_parsed
+            yield name, self.replay_lines(path, failure), errors
+
+    def replay_lines(self, path, failure):
+        # Validated lines come back one JSON string per line, so a finished file is never held in memory
+        if failure:
+            raise ValueError(failure)
         try:
-            data = file_reader(file)
-            if not data:
-                errors.append({file.name: "The file is empty"})
-                return lines, errors
-
-            for line_number, item in enumerate(data, start=1):
-                if isinstance(item, dict): # txt, json, jsonl, csv
-                    value = item.get(key)
-                    if value:
-                        lines.append(value)
-                    else:
-                        errors.append({file.name: f"Line {line_number}: No data found for the key '{key}'"})
-
-                elif isinstance(item, str): # conllu
-                    if item:
-                        lines.append(item)
-                    else:
-                        errors.append({file.name: f"Line {line_number}: Invalid data"})
-
+            with open(path, 'rb') as lines:
+                for line in lines:
+                    yield json.loads(line)
+        finally:
+            os.remove(path)
+
+    def insert_documents(self, project, lines):
+        hashes = [Document.hash_text(line) for line in lines]
+        for attempt in range(1, self.insert_attempts + 1):
+            try:
+                # Savepoint, a concurrent import can insert the same text between the lookup and the insert.
+                # The batch is then looked up again and the texts it lost the race for are skipped
+                with transaction.atomic():
+                    documents, skipped, near_duplicates = self.create_documents(project, lines, hashes)
+                break
+            except IntegrityError:
+                if attempt == self.insert_attempts:
+                    raise
+
+        self.rows_skipped += skipped
+        self.rows_near_duplicate += near_duplicates
+        return documents
+
+    def existing_hashes(self, project, hashes):
+        # One indexed lookup per batch finds the texts that are already in the project
+        return set(
+            Document.objects.filter(project=project, content_hash__in=hashes).values_list('content_hash', flat=True)
+        )
+
+    def create_documents(self, project, lines, hashes):
+        existing = self.existing_hashes(project, hashes)
+        documents = []
+        for line, content_hash in zip(lines, hashes):
+            if content_hash not in existing:
+                existing.add(content_hash)
+                documents.append(Document(project=project, text=line, content_hash=content_hash,
+                                          token_offsets=TokenAligner.pack_offsets(line)))
+        skipped = len(lines) - len(documents)
+
+        if not self.near_duplicate_index:
+            return Document.objects.bulk_create(documents), skipped, 0
+
+        matches = self.near_duplicate_index.match(documents)
+        if self.near_duplicate_mode == 'drop':
+            kept = [document for document, match in zip(documents, matches) if match is None]
+            Document.objects.bulk_create(kept)
+            self.near_duplicate_index.add(kept)
+            return kept, skipped, len(documents) - len(kept)
+
+        Document.objects.bulk_create(documents)
+        flagged = []
+        for document, match in zip(documents, matches):
+            if match is not None:
+                document.near_duplicate_of_id = match.pk
+                flagged.append(document)
+        Document.objects.bulk_update(flagged, ['near_duplicate_of'])
+
+        # Flagged documents stay out of the index, their original already represents them
+        self.near_duplicate_index.add([document for document, match in zip(documents, matches) if match is None])
+        return documents, skipped, len(flagged)
+
+    def file_transaction(self):
+        # Background jobs commit batch by batch so their progress is visible while they run
+        if self.context.get('import_job'):
+            return nullcontext()
+        return transaction.atomic()
+
+    def discard_documents(self, document_ids, counts):
+        # Synchronous imports were rolled back by the transaction, background jobs committed batch by batch
+        if document_ids and self.context.get('import_job'):
+            Document.objects.filter(pk__in=document_ids).delete()
+        self.rows_inserted, self.rows_skipped, self.rows_near_duplicate = counts
+        self.report_progress(0)
+
+    def report_progress(self, rows_inserted):
+        self.rows_inserted += rows_inserted
+
+        import_job = self.context.get('import_job')
+        if import_job:
+            import_job.rows_parsed = self.rows_parsed
+            import_job.rows_inserted = self.rows_inserted
+            import_job.rows_skipped = self.rows_skipped
+            import_job.rows_near_duplicate = self.rows_near_duplicate
+            import_job.save(update_fields=['rows_parsed', 'rows_inserted', 'rows_skipped', 'rows_near_duplicate',
+                                           'updated_at'])
+
+    def validate_file_content(self, file, file_reader, key, errors):
+        line_number = 0
+        for line_number, item in enumerate(file_reader(file), start=1):
+            self.rows_parsed += 1
+            if isinstance(item, dict): # txt, json, jsonl, csv
+                value = item.get(key)
+                if value:
+                    yield value
                 else:
-                    errors.append({file.name: f"Line {line_number}: Key '{key}' not found"})
-
-        except (json.JSONDecodeError, csv.Error, Exception) as e:
-            errors.append({file.name: f"{str(e)}"})
-
-        return lines, errors
+                    errors.append({file.name: f"Line {line_number}: No data found for the key '{key}'"})
 
+            elif isinstance(item, str): # conllu
+                if item:
+                    yield item
+                else:
+                    errors.append({file.name: f"Line {line_number}: Invalid data"})
+
+            else:
+                errors.append({file.name: f"Line {line_number}: Key '{key}' not found"})
+
+        if not line_number:
+            errors.append({file.name: "The file is empty"})
+
+
+def parse_import_file(name, source, file_format, key):
+    serializer = ImportDocumentSerializer()
+    errors = []
+    output = tempfile.NamedTemporaryFile(suffix=".jsonl", delete=False)
+    try:
+        with output, FileWorkerPool.open(name, source) as file:
+            file_reader = serializer.get_file_reader(file_format, key)
+            for line in serializer.validate_file_content(file, file_reader, key, errors):
+                output.write(json.dumps(line).encode('utf-8') + b"\n")
+        return name, output.name, errors, serializer.rows_parsed, None
+    except (json.JSONDecodeError, csv.Error, Exception) as e:
+        os.remove(output.name)
+        return name, None, [], serializer.rows_parsed, str(e)
@@ -1,3 +1,388 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import numpy as np
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.utils.timezone import now
+
+from NLPres_backend.testing import ProjectTestCase
+from document.classes.NearDuplicateIndex import NearDuplicateIndex
+from document.models import Document, Annotation, ImportJob, ExportJob, DocumentSignature, SignatureBucket
+from document.serializers import ImportDocumentSerializer
+from enums.ProjectCategory import ProjectCategory
+from label.models import Label
+
+
+class SequentialExportTest(ProjectTestCase):
+    category = ProjectCategory.SEQUENTIAL
+
+    def setUp(self):
+        super().setUp()
+        self.labels = [Label.objects.create(name=name, color='#000000', project=self.project)
+                       for name in ('PER', 'LOC')]
+
+    def create_documents(self, count):
+        for i in range(count):
+            document = Document.objects.create(project=self.project, text=f'John lives in Paris {i}')
+            Annotation.objects.create(document=document, user=self.user, label=self.labels[0], start=0, end=4)
+            Annotation.objects.create(document=document, user=self.user, label=self.labels[1], start=14, end=19)
+
+    def export(self, headers=None):
+        return self.client.post(self.project_url('document/export'),
+                                {'export_as': 'jsonl', 'annotated_only': False}, format='json', headers=headers)
+
+    def export_lines(self):
+        return b"".join(self.export().streaming_content).decode('utf-8').splitlines()
+
+    def test_export_query_count_is_constant(self):
+        for count in (1, 20):
+            Document.objects.filter(project=self.project).delete()
+            self.create_documents(count)
+
+            # Collaborator check, project lookups, cache version aggregates, documents and one annotation query
+            with self.assertNumQueries(9):
+                lines = self.export_lines()
+
+            self.assertEqual(len(lines), count)
+
+    def test_export_groups_annotations_by_document(self):
+        self.create_documents(3)
+        Document.objects.create(project=self.project, text='No entities here')
+
+        lines = self.export_lines()
+
+        self.assertEqual(len(lines), 4)
+        self.assertIn('"labels": ["PER", "_", "_", "LOC", "_"]', lines[0])
+        self.assertIn('"label": []', lines[3])
+
+    def test_npz_export_loads_with_numpy(self):
+        self.create_documents(2)
+        response = self.client.post(self.project_url('document/export'),
+                                    {'export_as': 'npz', 'annotated_only': False}, format='json')
+
+        archive = np.load(io.BytesIO(b"".join(response.streaming_content)))
+
+        self.assertEqual(archive["offsets"].tolist(), [0, 5, 10])
+        self.assertEqual([archive["labels"][label_id] for label_id in archive["label_ids"][:5]],
+                         ['PER', '_', '_', 'LOC', '_'])
+
+    def test_compressed_export_decompresses_to_the_plain_export(self):
+        self.create_documents(3)
+        plain = b"".join(self.export().streaming_content)
+
+        # The second request is served from the export cache
+        for _ in range(2):
+            response = self.client.post(self.project_url('document/export'),
+                                        {'export_as': 'jsonl', 'annotated_only': False, 'compress': True},
+                                        format='json')
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], 'application/gzip')
+            self.assertEqual(response['Content-Disposition'], 'attachment; filename="export_data.jsonl.gz"')
+            self.assertEqual(gzip.decompress(b"".join(response.streaming_content)), plain)
+
+    def test_spans_outside_an_edited_text_are_dropped(self):
+        self.create_documents(2)
+        document = Document.objects.filter(project=self.project).order_by('id').last()
+        document.text = 'John'
+        document.save()
+
+        response = self.client.post(self.project_url('document/export'),
+                                    {'export_as': 'conllu', 'annotated_only': False}, format='json')
+        sentences = b"".join(response.streaming_content).decode('utf-8').strip().split('\n\n')
+
+        self.assertEqual(len(sentences), 2)
+        self.assertTrue(sentences[1].startswith('# text = John\n1\tJohn\tjohn\tPER'))
+
+    def test_unchanged_export_is_served_from_cache(self):
+        self.create_documents(3)
+        response = self.export()
+        content = b"".join(response.streaming_content)
+
+        cached = self.export()
+        self.assertEqual(cached['ETag'], response['ETag'])
+        self.assertEqual(b"".join(cached.streaming_content), content)
+        self.assertEqual(self.export({'If-None-Match': response['ETag']}).status_code, 304)
+
+        Document.objects.create(project=self.project, text='A new document')
+        changed = self.export({'If-None-Match': response['ETag']})
+        self.assertNotEqual(changed['ETag'], response['ETag'])
+        self.assertEqual(len(b"".join(changed.streaming_content).splitlines()), 4)
+
+
+class AggregatedExportTest(ProjectTestCase):
+
+    def setUp(self):
+        super().setUp()
+        positive, negative = (Label.objects.create(name=name, color='#000000', project=self.project)
+                              for name in ('positive', 'negative'))
+        annotators = [self.user] + [self.create_user(f'annotator{i}@example.com') for i in range(2)]
+        agreed = Document.objects.create(project=self.project, text='Great')
+        split = Document.objects.create(project=self.project, text='Fine')
+        Document.objects.create(project=self.project, text='Unread')
+        for annotator, label in zip(annotators, (positive, negative, positive)):
+            Annotation.objects.create(document=agreed, user=annotator, label=positive)
+            Annotation.objects.create(document=split, user=annotator, label=label)
+
+    def export(self, export_as):
+        response = self.client.post(self.project_url('document/export'),
+                                    {'export_as': export_as, 'annotated_only': False, 'aggregate': True},
+                                    format='json')
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode('utf-8')
+
+    def assert_aggregated(self):
+        self.assertEqual([json.loads(line) for line in self.export('jsonl').splitlines()], [
+            {'text': 'Great', 'label': 'positive', 'labels': ['positive'] * 3, 'agreement': 1.0},
+            {'text': 'Fine', 'label': 'positive', 'labels': ['positive', 'negative', 'positive'],
+             'agreement': 0.6667},
+            {'text': 'Unread', 'label': None, 'labels': [], 'agreement': None},
+        ])
+
+        rows = list(csv.reader(io.StringIO(self.export('csv'))))
+        self.assertEqual(rows[0], ['text', 'label', 'labels', 'agreement'])
+        self.assertEqual(rows[2], ['Fine', 'positive', 'positive|negative|positive', '0.6667'])
+        self.assertEqual(rows[3], ['Unread', '', '', ''])
+
+    @skipUnless(connection.vendor == 'postgresql', "ArrayAgg needs PostgreSQL")
+    def test_postgresql_aggregates_in_the_database(self):
+        self.assert_aggregated()
+
+    def test_fallback_groups_the_join(self):
+        with mock.patch.object(connection, 'vendor', 'sqlite'):
+            self.assert_aggregated()
+
+    def test_aggregate_is_rejected_for_sequential_projects(self):
+        self.project.category = ProjectCategory.SEQUENTIAL.value
+        self.project.save()
+
+        response = self.client.post(self.project_url('document/export'),
+                                    {'export_as': 'jsonl', 'annotated_only': False, 'aggregate': True},
+                                    format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('aggregate', response.data)
+
+
+class ExportJobTest(ProjectTestCase):
+
+    def setUp(self):
+        super().setUp()
+        for i in range(3):
+            Document.objects.create(project=self.project, text=f'review {i}')
+
+    def start_export(self):
+        response = self.client.post(self.project_url('document/export'),
+                                    {'export_as': 'jsonl', 'annotated_only': False, 'background': True},
+                                    format='json')
+        self.assertEqual(response.status_code, 202)
+        return ExportJob.objects.get(pk=response.data['job_id'])
+
+    def download(self, job):
+        return self.client.get(self.project_url(f'document/export/{job.id}/download'))
+
+    def process_jobs(self):
+        call_command('process_export_jobs', '--once', stdout=io.StringIO())
+
+    def test_download_is_refused_until_the_job_completes(self):
+        job = self.start_export()
+
+        self.assertEqual(self.download(job).status_code, 409)
+
+        self.process_jobs()
+        response = self.download(job)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="export_data.jsonl"')
+        self.assertEqual(len(b"".join(response.streaming_content).splitlines()), 3)
+
+    def test_expired_export_is_gone_and_removed(self):
+        job = self.start_export()
+        self.process_jobs()
+        job.refresh_from_db()
+        path = job.path
+        self.assertTrue(default_storage.exists(path))
+
+        ExportJob.objects.filter(pk=job.id).update(expires_at=now() - timedelta(minutes=1))
+        self.assertEqual(self.download(job).status_code, 410)
+
+        # Expired files are removed before the worker polls for jobs
+        self.process_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.path, '')
+        self.assertFalse(default_storage.exists(path))
+        self.assertEqual(self.download(job).status_code, 410)
+
+    def test_unexpired_exports_are_kept(self):
+        job = self.start_export()
+        self.process_jobs()
+
+        self.assertEqual(ExportJob.remove_expired(), 0)
+        job.refresh_from_db()
+        self.assertTrue(default_storage.exists(job.path))
+
+    def test_other_users_cannot_download(self):
+        job = self.start_export()
+        self.process_jobs()
+        self.client.force_authenticate(self.create_user('other@example.com'))
+
+        self.assertEqual(self.download(job).status_code, 403)
+
+
+class DocumentImportTest(ProjectTestCase):
+
+    def jsonl(self, start, stop, trailer=""):
+        return "".join(f'{{"text": "review {i}"}}\n' for i in range(start, stop)) + trailer
+
+    def test_rolled_back_file_is_not_counted(self):
+        files = [
+            SimpleUploadedFile('good.jsonl', self.jsonl(0, 1500).encode('utf-8')),
+            # Fails after the first batch of this file has already been inserted
+            SimpleUploadedFile('bad.jsonl', self.jsonl(1500, 2700, "{not json\n").encode('utf-8')),
+        ]
+        response = self.client.post(self.project_url('document/create'),
+                                    {'files': files, 'file_format': 'jsonl', 'key': 'text',
+                                     'response_mode': 'summary'}, format='multipart')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Document.objects.filter(project=self.project).count(), 1500)
+        self.assertEqual(response.data['imported'], 1500)
+        self.assertTrue(response.data['message'].startswith("1500 data imported"))
+        self.assertEqual(response.data['error_count'], 1)
+        self.assertIn('bad.jsonl', response.data['errors'][0])
+
+    def test_line_breaks_match_in_memory_and_on_disk(self):
+        content = b'first\rsecond\r\nthird\nfourth'
+        # 0 spills every upload to a TemporaryUploadedFile, which is read through mmap
+        for max_memory_size in (0, 2621440):
+            Document.objects.filter(project=self.project).delete()
+            with self.settings(FILE_UPLOAD_MAX_MEMORY_SIZE=max_memory_size):
+                response = self.client.post(self.project_url('document/create'),
+                                            {'files': [SimpleUploadedFile('lines.txt', content)],
+                                             'file_format': 'txt', 'key': 'text'}, format='multipart')
+
+            self.assertEqual(response.status_code, 201)
+            self.assertEqual(list(Document.objects.filter(project=self.project).order_by('id')
+                                  .values_list('text', flat=True)), ['first', 'second', 'third', 'fourth'])
+
+    def import_jsonl(self, content):
+        return self.client.post(self.project_url('document/create'),
+                                {'files': [SimpleUploadedFile('reviews.jsonl', content.encode('utf-8'))],
+                                 'file_format': 'jsonl', 'key': 'text', 'response_mode': 'summary'},
+                                format='multipart')
+
+    def test_duplicates_are_skipped(self):
+        Document.objects.create(project=self.project, text='review 0', content_hash=Document.hash_text('review 0'))
+
+        response = self.import_jsonl(self.jsonl(0, 3) + self.jsonl(1, 2))
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['imported'], 2)
+        self.assertEqual(response.data['duplicates'], 2)
+        self.assertEqual(Document.objects.filter(project=self.project).count(), 3)
+
+    def test_text_inserted_by_a_concurrent_import_is_skipped(self):
+        existing_hashes = ImportDocumentSerializer.existing_hashes
+        lookups = []
+
+        def stale_lookup(serializer, project, hashes):
+            # The first lookup runs before another import commits "review 1"
+            lookups.append(hashes)
+            return set() if len(lookups) == 1 else existing_hashes(serializer, project, hashes)
+
+        Document.objects.create(project=self.project, text='review 1', content_hash=Document.hash_text('review 1'))
+        with mock.patch.object(ImportDocumentSerializer, 'existing_hashes', stale_lookup):
+            response = self.import_jsonl(self.jsonl(0, 3))
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(lookups), 2)
+        self.assertEqual(response.data['imported'], 2)
+        self.assertEqual(response.data['duplicates'], 1)
+        self.assertEqual(sorted(Document.objects.filter(project=self.project).values_list('text', flat=True)),
+                         ['review 0', 'review 1', 'review 2'])
+
+    def test_import_job_keeps_every_error(self):
+        path = default_storage.save('imports/lines.jsonl',
+                                    ContentFile(self.jsonl(0, 10) + '{"title": "no text"}\n' * 150))
+        job = ImportJob.objects.create(project=self.project, user=self.user, file_format='jsonl', key='text',
+                                       files=[{"name": "lines.jsonl", "path": path}])
+
+        call_command('process_import_jobs', '--once', stdout=io.StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual(job.rows_inserted, 10)
+        self.assertEqual(len(job.errors), 150)
+
+
+class NearDuplicateTest(ProjectTestCase):
+    text = ("The quarterly report shows that revenue grew by twelve percent while operating costs stayed flat "
+            "across every region we serve this year")
+    other = "A completely unrelated sentence about hiking in the mountains with friends during a rainy weekend"
+
+    def import_texts(self, texts, mode):
+        content = "".join(json.dumps({"text": text}) + "\n" for text in texts).encode('utf-8')
+        return self.client.post(self.project_url('document/create'),
+                                {'files': [SimpleUploadedFile('texts.jsonl', content)], 'file_format': 'jsonl',
+                                 'key': 'text', 'near_duplicates': mode, 'response_mode': 'summary'},
+                                format='multipart')
+
+    def test_flag_mode_links_near_duplicates(self):
+        near = self.text.replace("twelve", "eleven")
+        response = self.import_texts([self.text, near, self.other], 'flag')
+
+        self.assertEqual(response.data['imported'], 3)
+        self.assertEqual(response.data['near_duplicates'], 1)
+        original = Document.objects.get(text=self.text)
+        self.assertEqual(Document.objects.get(text=near).near_duplicate_of, original)
+        self.assertIsNone(Document.objects.get(text=self.other).near_duplicate_of)
+
+        # Stored documents are matched by later imports
+        self.import_texts([self.text.replace("twelve", "ten")], 'flag')
+        self.assertEqual(Document.objects.get(text=self.text.replace("twelve", "ten")).near_duplicate_of, original)
+
+    def test_drop_mode_skips_near_duplicates(self):
+        response = self.import_texts([self.text, self.text.replace("twelve", "eleven"), self.other], 'drop')
+
+        self.assertEqual(response.data['imported'], 2)
+        self.assertEqual(response.data['near_duplicates'], 1)
+        self.assertEqual(set(Document.objects.values_list('text', flat=True)), {self.text, self.other})
+
+    def test_off_mode_keeps_everything(self):
+        response = self.import_texts([self.text, self.text.replace("twelve", "eleven")], 'off')
+
+        self.assertEqual(response.data['imported'], 2)
+        self.assertFalse(DocumentSignature.objects.exists())
+
+    def test_buckets_keep_a_bounded_number_of_documents(self):
+        index = NearDuplicateIndex(self.project)
+        index.max_bucket_documents = 3
+        # Whitespace is normalized before shingling, so all of them share every bucket
+        documents = [Document.objects.create(project=self.project, text=self.text + " " * i) for i in range(6)]
+        for batch in (documents[:2], documents[2:]):
+            index.match(batch)
+            index.add(batch)
+
+        sizes = SignatureBucket.objects.values('bucket').annotate(size=Count('id')).values_list('size', flat=True)
+        self.assertEqual(set(sizes), {3})
+        self.assertEqual(DocumentSignature.objects.count(), 6)
+        self.assertIn(index.match([Document(project=self.project, text=self.text)])[0], documents[:3])
+
+    def test_edited_text_is_reindexed(self):
+        self.import_texts([self.other], 'flag')
+        document = Document.objects.get()
+        response = self.client.put(self.project_url(f'document/{document.id}'), {'text': self.text}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.import_texts([self.text.replace("twelve", "eleven"), self.other.replace("rainy", "sunny")], 'flag')
+
+        self.assertEqual(Document.objects.get(text=self.text.replace("twelve", "eleven")).near_duplicate_of, document)
+        self.assertIsNone(Document.objects.get(text=self.other.replace("rainy", "sunny")).near_duplicate_of)
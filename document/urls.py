@@ -6,7 +6,10 @@ urlpatterns = [
     path('pagination', views.pagination, name='pagination'),
     path('progress', views.progress, name='progress'),
     path('create', views.create, name='create'),
+    path('import/<int:job_id>', views.import_job, name='import_job'),
     path('<int:document_id>',views.document_details,name='document_details'),
     path('<int:document_id>/clear',views.clear_label,name='clear_label'),
-    path('export', views.export, name='export')
+    path('export', views.export, name='export'),
+    path('export/<int:job_id>', views.export_job, name='export_job'),
+    path('export/<int:job_id>/download', views.download_export, name='download_export'),
 ]
\ No newline at end of file
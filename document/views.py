@@ -1,9 +1,11 @@
 from lib2to3.fixes.fix_input import context
 
 from conllu.serializer import serialize
+from django.core.files.storage import default_storage
 from django.db.models import Count
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse, FileResponse, HttpResponseNotModified
 from django.shortcuts import get_object_or_404
+from django.utils.http import quote_etag, parse_etags
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.pagination import PageNumberPagination
@@ -13,8 +15,11 @@ from rest_framework.response import Response
 from NLPres_backend.permissions.IsProjectCollaborator import IsProjectCollaborator
 from NLPres_backend.permissions.IsProjectOwnerOrReadOnly import IsProjectOwnerOrReadOnly
 from NLPres_backend.util import calculate_progress
-from document.models import Document, Annotation
-from document.serializers import DocumentSerializer, ImportDocumentSerializer, ExportDocumentSerializer
+from document.classes.ExportCache import ExportCache
+from document.models import Document, Annotation, ImportJob, ExportJob
+from document.serializers import DocumentSerializer, ImportDocumentSerializer, ExportDocumentSerializer, \
+    ImportJobSerializer, ExportJobSerializer
+from enums.JobStatus import JobStatus
 from enums.ProjectCategory import ProjectCategory
 from project.models import Project
 
@@ -58,26 +63,73 @@ def progress(request, project_id):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated, IsProjectOwnerOrReadOnly])
 def create(request, project_id):
-    serializer = ImportDocumentSerializer(data=request.data, context={'project_id': project_id})
+    serializer = ImportDocumentSerializer(data=request.data, context={'project_id': project_id, 'request': request})
     if serializer.is_valid():
         response_data = serializer.save()
+        if serializer.validated_data['background']:
+            return Response(response_data, status=status.HTTP_202_ACCEPTED)
+        if serializer.validated_data['response_mode'] == 'ndjson':
+            return StreamingHttpResponse(response_data, content_type='application/x-ndjson',
+                                         status=status.HTTP_201_CREATED)
         return Response(response_data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-@api_view(['POST'])
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsProjectOwnerOrReadOnly])
+def import_job(request, project_id, job_id):
+    job = get_object_or_404(ImportJob, project_id=project_id, pk=job_id)
+    return Response(ImportJobSerializer(job).data)
+
+
+@api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated, IsProjectCollaborator])
 def export(request, project_id):
-    serializer = ExportDocumentSerializer(data=request.data, context={'project_id': project_id, 'request': request})
+    data = request.query_params if request.method == 'GET' else request.data
+    serializer = ExportDocumentSerializer(data=data, context={'project_id': project_id, 'request': request})
     if serializer.is_valid():
-        data, content_type = serializer.save()
-        response = HttpResponse(data, content_type=content_type)
-        response['Content-Disposition'] = 'attachment; filename="export_data"'
+        if serializer.validated_data['background']:
+            return Response(serializer.create_export_job(), status=status.HTTP_202_ACCEPTED)
+
+        cache = ExportCache()
+        key = serializer.cache_key(cache)
+        etag = quote_etag(key)
+
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        elif cached_file := cache.open(key):
+            response = FileResponse(cached_file, content_type=serializer.get_content_type())
+        else:
+            data, content_type = serializer.save()
+            response = StreamingHttpResponse(cache.tee(key, data), content_type=content_type)
+
+        response['ETag'] = etag
+        if response.status_code == status.HTTP_200_OK:
+            response['Content-Disposition'] = f'attachment; filename="{serializer.get_filename()}"'
         return response
 
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsProjectCollaborator])
+def export_job(request, project_id, job_id):
+    job = get_object_or_404(ExportJob, project_id=project_id, user=request.user, pk=job_id)
+    return Response(ExportJobSerializer(job).data)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated, IsProjectCollaborator])
+def download_export(request, project_id, job_id):
+    job = get_object_or_404(ExportJob, project_id=project_id, user=request.user, pk=job_id)
+    if job.status != JobStatus.COMPLETED.value:
+        return Response({"detail": "The export is not ready."}, status=status.HTTP_409_CONFLICT)
+    if job.is_expired or not job.path or not default_storage.exists(job.path):
+        return Response({"detail": "The export has expired."}, status=status.HTTP_410_GONE)
+
+    return FileResponse(default_storage.open(job.path), as_attachment=True, filename=job.filename)
+
+
 @api_view(['GET', 'PUT', 'DELETE'])
 @permission_classes([IsAuthenticated, IsProjectOwnerOrReadOnly])
 def document_details(request, project_id, document_id):
@@ -0,0 +1,12 @@
+from enum import Enum
+
+
+class JobStatus(Enum):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+
+    @classmethod
+    def choices(cls):
+        return [(key.value, key.name) for key in cls]
@@ -6,7 +6,7 @@ from document.models import Annotation
 from evaluation.classes.BaseEvaluation import BaseEvaluation
 from statsmodels.stats.inter_rater import fleiss_kappa as fleiss_kappa_score
 from label.models import Label
-from utility.FileProcessor import FileProcessor
+from utility.TokenAligner import TokenAligner
 
 
 class Sequential(BaseEvaluation):
@@ -16,10 +16,11 @@ class Sequential(BaseEvaluation):
 
     def __init__(self, project, documents, user_ids: list):
         super().__init__(project, documents, user_ids)
-        file_processor = FileProcessor()
+        aligner = TokenAligner()
         self.annotators = [[] for _ in range(len(user_ids))]
 
         for document in self.documents:
+            offsets = document.offsets
             for i, user_id in enumerate(self.user_ids):
                 annotations = Annotation.objects.filter(document=document, user_id=user_id).all()
                 annotations = sorted(annotations, key=lambda x: (x.start, x.end))
@@ -27,31 +28,8 @@ class Sequential(BaseEvaluation):
                     [annotation.start, annotation.end, annotation.label.name] for annotation in annotations
                 ]
 
-                text = document.text
-                labels = all_label
-                tokens = []
-                idx = 0
-
-                prev_end = -1
-
-                for label in labels:
-                    start, end, label_name = label
-
-                    if start != (prev_end + 1):
-                        segment = text[prev_end + 1: start]
-                        prev_end = start - 1
-                        idx, tokens = file_processor.add_tokens(idx, tokens, segment)
-
-                    word = text[start:end + 1] if (start == end) else text[start:end]
-                    prev_end = end
-                    idx, token = file_processor.create_token(idx, word, label_name)
-                    tokens.append(token)
-
-                if prev_end != len(text) - 1:
-                    segment = text[prev_end + 1: len(text)]
-                    idx, tokens = file_processor.add_tokens(idx, tokens, segment)
-
-                self.annotators[i].append(token["upostag"] for token in tokens)
+                label_ids = aligner.align_labels(offsets, len(document.text), all_label)
+                self.annotators[i].append(aligner.labels(label_ids))
 
     def cohen_kappa(self):
         y1 = flatten(self.annotators[0])
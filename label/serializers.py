@@ -3,6 +3,7 @@ from django.shortcuts import get_object_or_404
 from rest_framework import serializers
 from label.models import Label
 from project.models import Project
+from upload.serializers import UploadSessionFileField, merge_uploads, consume_uploads
 from utility.FileProcessor import FileProcessor
 
 
@@ -43,13 +44,18 @@ class ExportLabelSerializer(serializers.Serializer, FileProcessor):
         return self.convert(labels_data, "json"), 'application/octet-stream'
 
 class ImportLabelSerializer(serializers.Serializer, FileProcessor):
-    files = serializers.ListField(child=serializers.FileField())
+    files = serializers.ListField(child=serializers.FileField(), required=False)
+    uploads = serializers.ListField(child=UploadSessionFileField(), required=False)
+
+    def validate(self, attrs):
+        return merge_uploads(attrs)
 
     def create(self, validated_data):
         files = validated_data['files']
         project = get_object_or_404(Project, id=self.context.get('project_id'))
 
-        created_labels, file_errors = self.process_files(files, project)
+        with consume_uploads(files):
+            created_labels, file_errors = self.process_files(files, project)
 
         if created_labels:
             message = f"{len(created_labels)} label(s) imported successfully from {len(files)} file(s)."
@@ -85,12 +91,8 @@ class ImportLabelSerializer(serializers.Serializer, FileProcessor):
         lines = []
         errors = []
         try:
-            data = self.read_json(file)
-            if not data:
-                errors.append({file.name: "The file is empty"})
-                return lines, errors
-
-            for line_number, item in enumerate(data, start=1):
+            line_number = 0
+            for line_number, item in enumerate(self.iter_json(file), start=1):
                 if isinstance(item, dict):
                     name = item.get("name")
                     color = item.get("color")
@@ -101,7 +103,12 @@ class ImportLabelSerializer(serializers.Serializer, FileProcessor):
                 else:
                     errors.append({file.name: f"Line {line_number}:No data found"})
 
-        except json.JSONDecodeError as e:
-            errors.append({file.name: f"{str(e)}"})
+            if not line_number:
+                errors.append({file.name: "The file is empty"})
+
+        except (json.JSONDecodeError, ValueError) as e:
+            # Nothing is imported from a file that fails to parse, only the parse error is reported
+            lines = []
+            errors = [{file.name: f"{str(e)}"}]
 
         return lines, errors
\ No newline at end of file
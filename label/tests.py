@@ -1,3 +1,25 @@
-from django.test import TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
 
-# Create your tests here.
+from NLPres_backend.testing import ProjectTestCase
+from label.models import Label
+
+
+class LabelImportTest(ProjectTestCase):
+
+    def test_file_failing_to_parse_imports_nothing(self):
+        content = b'[{"name": "POS", "color": "#00ff00"}, {"name": "NEG", "color": }]'
+        response = self.client.post(self.project_url('label/import'),
+                                    {'files': [SimpleUploadedFile('labels.json', content)]}, format='multipart')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse(Label.objects.filter(project=self.project).exists())
+        self.assertEqual(len(response.data['errors']), 1)
+        self.assertIn('labels.json', response.data['errors'][0])
+
+    def test_file_with_byte_order_mark(self):
+        content = '[{"name": "POS", "color": "#00ff00"}]'.encode('utf-8-sig')
+        response = self.client.post(self.project_url('label/import'),
+                                    {'files': [SimpleUploadedFile('labels.json', content)]}, format='multipart')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(list(Label.objects.filter(project=self.project).values_list('name', flat=True)), ['POS'])
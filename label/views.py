@@ -35,7 +35,7 @@ def create(request, project_id):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated, IsProjectOwnerOrReadOnly])
 def import_file(request, project_id):
-    serializer = ImportLabelSerializer(data=request.data, context={'project_id': project_id})
+    serializer = ImportLabelSerializer(data=request.data, context={'project_id': project_id, 'request': request})
     if serializer.is_valid():
         response_data = serializer.save()
         return Response(response_data, status=status.HTTP_201_CREATED)
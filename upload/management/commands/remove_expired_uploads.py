@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from upload.models import UploadSession
+
+
+class Command(BaseCommand):
+    help = "Remove upload sessions that were abandoned or never used, for deployments without an import worker"
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Removed {UploadSession.remove_expired()} expired upload session(s)")
@@ -0,0 +1,102 @@
+import os
+import shutil
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import models
+from django.utils.timezone import now
+
+from utility.AtomicFile import AtomicFile
+
+
+class UploadSession(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    total_chunks = models.PositiveIntegerField(null=True, blank=True)
+    size = models.PositiveBigIntegerField(default=0)
+    is_complete = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'upload_sessions'
+
+    @property
+    def directory(self):
+        return os.path.join(settings.MEDIA_ROOT, 'uploads', str(self.id))
+
+    @property
+    def path(self):
+        # A fixed name, the uploaded filename could collide with a chunk such as "0.part"
+        return os.path.join(self.directory, 'assembled')
+
+    @property
+    def received_chunks(self):
+        # Read from disk so that concurrent chunk uploads never overwrite each other's bookkeeping
+        if not os.path.isdir(self.directory):
+            return []
+        indexes = (name[:-len('.part')] for name in os.listdir(self.directory) if name.endswith('.part'))
+        return sorted(int(index) for index in indexes if index.isdigit())
+
+    def chunk_path(self, index):
+        return os.path.join(self.directory, f"{index}.part")
+
+    def write_chunk(self, index, stream, block_size=1024 * 1024):
+        with AtomicFile(self.chunk_path(index)) as chunk:
+            while block := stream.read(block_size):
+                chunk.write(block)
+
+        self.save(update_fields=['updated_at'])
+
+    def missing_chunks(self):
+        received_chunks = self.received_chunks
+        # Without a declared total, the chunks received so far must at least be contiguous
+        if self.total_chunks is not None:
+            expected = self.total_chunks
+        else:
+            expected = received_chunks[-1] + 1 if received_chunks else 1
+        return sorted(set(range(expected)) - set(received_chunks))
+
+    def assemble(self):
+        indexes = self.received_chunks
+        with open(self.path, 'wb') as assembled:
+            for index in indexes:
+                with open(self.chunk_path(index), 'rb') as chunk:
+                    shutil.copyfileobj(chunk, assembled)
+        for index in indexes:
+            os.remove(self.chunk_path(index))
+
+        self.size = os.path.getsize(self.path)
+        self.is_complete = True
+        self.save(update_fields=['size', 'is_complete', 'updated_at'])
+
+    def open(self):
+        # The assembled file is read straight from disk by the FileProcessor readers
+        file = File(open(self.path, 'rb'), name=self.filename)
+        file.upload_session = self
+        return file
+
+    def move(self, name):
+        # Hand the assembled file over to default_storage by renaming it, then drop the session
+        name = default_storage.get_available_name(name)
+        path = default_storage.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(self.path, path)
+        self.delete()
+        return name
+
+    @classmethod
+    def remove_expired(cls):
+        # Sessions that were abandoned, or finalized but never used, together with their files
+        sessions = cls.objects.filter(updated_at__lte=now() - timedelta(hours=settings.UPLOAD_SESSION_EXPIRY_HOURS))
+        for session in sessions:
+            session.delete()
+        return len(sessions)
+
+    def delete(self, *args, **kwargs):
+        shutil.rmtree(self.directory, ignore_errors=True)
+        return super().delete(*args, **kwargs)
@@ -0,0 +1,66 @@
+import os
+from contextlib import contextmanager
+
+from django.utils.text import get_valid_filename
+from rest_framework import serializers
+
+from upload.models import UploadSession
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    id = serializers.UUIDField(read_only=True)
+    filename = serializers.CharField(required=True, max_length=255)
+    total_chunks = serializers.IntegerField(required=False, allow_null=True, min_value=1)
+    received_chunks = serializers.ListField(child=serializers.IntegerField(), read_only=True)
+    missing_chunks = serializers.SerializerMethodField()
+    size = serializers.IntegerField(read_only=True)
+    is_complete = serializers.BooleanField(read_only=True)
+
+    class Meta:
+        model = UploadSession
+        fields = ['id', 'filename', 'total_chunks', 'received_chunks', 'missing_chunks', 'size', 'is_complete',
+                  'created_at']
+
+    def validate_filename(self, value):
+        return get_valid_filename(os.path.basename(value))
+
+    def get_missing_chunks(self, obj):
+        return [] if obj.is_complete else obj.missing_chunks()
+
+    def create(self, validated_data):
+        return UploadSession.objects.create(user=self.context['request'].user, **validated_data)
+
+
+class UploadSessionFileField(serializers.UUIDField):
+    """
+    Accepts the id of a finalized upload session in place of a multipart file.
+    """
+
+    def to_internal_value(self, data):
+        session_id = super().to_internal_value(data)
+        user = getattr(self.context.get('request'), 'user', None)
+        session = UploadSession.objects.filter(pk=session_id, user_id=getattr(user, 'id', None), is_complete=True).first()
+        if not session:
+            raise serializers.ValidationError(f"Upload {session_id} not found or not finalized.")
+        return session.open()
+
+
+def merge_uploads(attrs):
+    # Finalized chunked uploads are handed to the readers like any other uploaded file
+    attrs['files'] = attrs.get('files', []) + attrs.pop('uploads', [])
+    if not attrs['files']:
+        raise serializers.ValidationError({"files": "Provide at least one file or finalized upload."})
+    return attrs
+
+
+@contextmanager
+def consume_uploads(files):
+    # Finalized uploads are single use, they are closed afterwards and removed once the request succeeded
+    sessions = [file.upload_session for file in files if hasattr(file, 'upload_session')]
+    try:
+        yield files
+    finally:
+        for session_file in (file for file in files if hasattr(file, 'upload_session')):
+            session_file.close()
+    for session in sessions:
+        session.delete()
@@ -0,0 +1,135 @@
+import gc
+import io
+import os
+import uuid
+import warnings
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.utils.timezone import now
+
+from NLPres_backend.testing import ProjectTestCase
+from document.models import Document, ImportJob
+from upload.models import UploadSession
+
+
+class UploadSessionTest(ProjectTestCase):
+
+    def create_session(self, filename='data.jsonl', total_chunks=None):
+        response = self.client.post('/api/upload/', {'filename': filename, 'total_chunks': total_chunks},
+                                    format='json')
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def put_chunk(self, upload_id, index, data):
+        return self.client.put(f'/api/upload/{upload_id}/{index}', data, content_type='application/octet-stream')
+
+    def test_chunks_are_assembled_in_order(self):
+        upload_id = self.create_session(total_chunks=3)
+        for index, data in ((2, b'three'), (0, b'one,'), (1, b'two,')):
+            self.assertEqual(self.put_chunk(upload_id, index, data).status_code, 200)
+
+        response = self.client.post(f'/api/upload/{upload_id}/finalize')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['is_complete'])
+        self.assertEqual(response.data['size'], 13)
+        with UploadSession.objects.get(pk=upload_id).open() as file:
+            self.assertEqual(file.name, 'data.jsonl')
+            self.assertEqual(file.read(), b'one,two,three')
+
+    def test_missing_chunks_are_reported(self):
+        upload_id = self.create_session(total_chunks=3)
+        self.put_chunk(upload_id, 1, b'two')
+
+        response = self.client.post(f'/api/upload/{upload_id}/finalize')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['missing_chunks'], [0, 2])
+
+    def test_empty_chunk_is_rejected(self):
+        upload_id = self.create_session()
+
+        response = self.put_chunk(upload_id, 0, b'')
+
+        self.assertEqual(response.status_code, 400)
+        directory = UploadSession.objects.get(pk=upload_id).directory
+        self.assertFalse(os.path.isdir(directory) and os.listdir(directory))
+
+    def test_filename_matching_a_chunk_name(self):
+        upload_id = self.create_session(filename='0.part', total_chunks=2)
+        self.put_chunk(upload_id, 0, b'first ')
+        self.put_chunk(upload_id, 1, b'second')
+
+        response = self.client.post(f'/api/upload/{upload_id}/finalize')
+
+        self.assertEqual(response.status_code, 200)
+        with UploadSession.objects.get(pk=upload_id).open() as file:
+            self.assertEqual(file.read(), b'first second')
+
+    def test_concurrent_chunks_are_all_received(self):
+        upload_id = self.create_session(total_chunks=2)
+        # Both requests load the session before either chunk is written
+        first, second = UploadSession.objects.get(pk=upload_id), UploadSession.objects.get(pk=upload_id)
+        first.write_chunk(0, io.BytesIO(b'a'))
+        second.write_chunk(1, io.BytesIO(b'b'))
+
+        session = UploadSession.objects.get(pk=upload_id)
+        self.assertEqual(session.received_chunks, [0, 1])
+        self.assertEqual(session.missing_chunks(), [])
+
+    def finalized_upload(self, content):
+        upload_id = self.create_session(filename='data.jsonl')
+        self.put_chunk(upload_id, 0, content)
+        self.client.post(f'/api/upload/{upload_id}/finalize')
+        return upload_id
+
+    def test_upload_is_closed_and_removed_once_imported(self):
+        upload_id = self.finalized_upload(b'{"text": "a"}\n{"text": "b"}\n')
+        directory = UploadSession.objects.get(pk=upload_id).directory
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always', ResourceWarning)
+            response = self.client.post(self.project_url('document/create'),
+                                        {'uploads': [upload_id], 'file_format': 'jsonl', 'key': 'text'},
+                                        format='json')
+            gc.collect()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertFalse([warning for warning in caught if issubclass(warning.category, ResourceWarning)])
+        self.assertEqual(Document.objects.filter(project=self.project).count(), 2)
+        self.assertFalse(UploadSession.objects.filter(pk=upload_id).exists())
+        self.assertFalse(os.path.exists(directory))
+
+    def test_background_import_takes_over_the_assembled_file(self):
+        upload_id = self.finalized_upload(b'{"text": "a"}\n')
+        assembled = UploadSession.objects.get(pk=upload_id).path
+        inode = os.stat(assembled).st_ino
+
+        response = self.client.post(self.project_url('document/create'),
+                                    {'uploads': [upload_id], 'file_format': 'jsonl', 'key': 'text',
+                                     'background': True}, format='json')
+
+        self.assertEqual(response.status_code, 202)
+        self.assertFalse(UploadSession.objects.filter(pk=upload_id).exists())
+        stored_file = ImportJob.objects.get(pk=response.data['job_id']).files[0]
+        # Renamed, not copied
+        self.assertEqual(os.stat(default_storage.path(stored_file['path'])).st_ino, inode)
+
+        call_command('process_import_jobs', '--once', stdout=io.StringIO())
+
+        self.assertEqual(Document.objects.filter(project=self.project).count(), 1)
+        self.assertFalse(default_storage.exists(stored_file['path']))
+
+    def test_expired_sessions_are_removed(self):
+        expired_id, recent_id = self.create_session(), self.create_session()
+        for upload_id in (expired_id, recent_id):
+            self.put_chunk(upload_id, 0, b'data')
+        UploadSession.objects.filter(pk=expired_id).update(updated_at=now() - timedelta(hours=25))
+        directory = UploadSession.objects.get(pk=expired_id).directory
+
+        call_command('remove_expired_uploads', stdout=io.StringIO())
+
+        self.assertEqual(list(UploadSession.objects.values_list('id', flat=True)), [uuid.UUID(recent_id)])
+        self.assertFalse(os.path.exists(directory))
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from upload import views
+
+urlpatterns = [
+    path('', views.create, name='create'),
+    path('<uuid:upload_id>', views.upload_details, name='upload_details'),
+    path('<uuid:upload_id>/<int:index>', views.upload_chunk, name='upload_chunk'),
+    path('<uuid:upload_id>/finalize', views.finalize, name='finalize'),
+]
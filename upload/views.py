@@ -0,0 +1,63 @@
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from upload.models import UploadSession
+from upload.serializers import UploadSessionSerializer
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def create(request):
+    serializer = UploadSessionSerializer(data=request.data, context={'request': request})
+    if serializer.is_valid():
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def upload_details(request, upload_id):
+    session = get_object_or_404(UploadSession, pk=upload_id, user=request.user)
+
+    if request.method == 'GET':
+        return Response(UploadSessionSerializer(session).data)
+
+    elif request.method == 'DELETE':
+        session.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@api_view(['PUT'])
+@permission_classes([IsAuthenticated])
+def upload_chunk(request, upload_id, index):
+    session = get_object_or_404(UploadSession, pk=upload_id, user=request.user)
+    if session.is_complete:
+        return Response({"detail": "Upload already finalized."}, status=status.HTTP_400_BAD_REQUEST)
+    if session.total_chunks is not None and index >= session.total_chunks:
+        return Response({"detail": f"Chunk index must be below {session.total_chunks}."},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    # The chunk is the raw request body, streamed to disk without going through the parsers
+    if request.stream is None:
+        return Response({"detail": "Chunk body is empty."}, status=status.HTTP_400_BAD_REQUEST)
+    session.write_chunk(index, request.stream)
+    return Response(UploadSessionSerializer(session).data)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def finalize(request, upload_id):
+    session = get_object_or_404(UploadSession, pk=upload_id, user=request.user)
+    if session.is_complete:
+        return Response(UploadSessionSerializer(session).data)
+
+    missing_chunks = session.missing_chunks()
+    if missing_chunks:
+        return Response({"missing_chunks": missing_chunks}, status=status.HTTP_400_BAD_REQUEST)
+
+    session.assemble()
+    return Response(UploadSessionSerializer(session).data)
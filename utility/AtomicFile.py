@@ -0,0 +1,30 @@
+import os
+import uuid
+
+
+class AtomicFile:
+    """
+    Opens a temporary file next to path for writing and moves it into place once the block exits without error.
+    Readers never see a partial file and a failed write never leaves one behind.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        directory, name = os.path.split(self.path)
+        os.makedirs(directory or '.', exist_ok=True)
+        # Hidden and unique, concurrent writers of the same path never share a temporary file
+        self.file = open(os.path.join(directory, f".{name}.{uuid.uuid4().hex}.tmp"), 'wb')
+        return self.file
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            self.file.close()
+            if exc_type is None:
+                os.replace(self.file.name, self.path)
+        finally:
+            if os.path.exists(self.file.name):
+                os.remove(self.file.name)
+        return False
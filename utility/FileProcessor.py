@@ -1,13 +1,34 @@
+import codecs
 import csv
 import io
 import json
-from collections import defaultdict
+import mmap
+import os
+import re
+import tempfile
+import zipfile
+import zlib
+from array import array
+from contextlib import contextmanager
 from importlib.metadata import metadata
-from io import StringIO
+from itertools import accumulate, chain, islice
+from operator import itemgetter
+
+import numpy as np
 from conllu import parse_incr, TokenList, Token, Metadata
+from utility.TokenAligner import TokenAligner
 
 
 class FileProcessor:
+    # Flattened rows kept in memory while the CSV header of a streamed export is inferred
+    csv_sample_size = 10000
+    # Records ending this close to a JSON chunk boundary are decoded again with the next chunk,
+    # longer than any token that can be cut in the middle ("-Infinity", "\\uXXXX")
+    json_boundary = 16
+    line_break = re.compile(rb'\r\n?|\n')
+    json_wrapper = re.compile(r'\{\s*"data"\s*:\s*\[')
+    # Bytes joined before a streamed export hands on a chunk, the writers yield about one record at a time
+    stream_buffer_size = 64 * 1024
 
     def convert(self, content, export_as, sequential=False):
         convert_method = getattr(self, f"to_{export_as}", None)
@@ -19,232 +40,466 @@ class FileProcessor:
 
         return convert_method(content)
 
+    def convert_file(self, file, file_format, export_as):
+        # Records flow from the streaming reader straight into the streaming writer, nothing is materialized
+        file_reader = getattr(self, f"iter_{file_format}", None)
+        if not callable(file_reader):
+            raise ValueError(f"Unsupported file format: {file_format}")
+
+        return self.stream(file_reader(file), export_as)
+
     # File Readers
     def read_txt(self, file):
-        content = file.read().decode('utf-8')
-        return [{"text": line.strip()} for line in content.splitlines() if line.strip()]
+        return list(self.iter_txt(file))
 
     def read_jsonl(self, file):
-        return [json.loads(line) for line in file.read().decode('utf-8').splitlines()]
-
-    def read_json(self, file):
-        data = json.load(file)
-
-        # Case 1: If the data is column-oriented JSON (keys are arrays)
-        if isinstance(data, dict):
-            # Check if the values of the dictionary are lists (column-oriented format)
-            if all(isinstance(value, list) for value in data.values()):
-                max_length = max(len(value) for value in data.values())
-                normalized_data = {key: value + [""] * (max_length - len(value)) for key, value in data.items()}
-                return [dict(zip(normalized_data.keys(), values)) for values in zip(*normalized_data.values())]
-            # If not a column-oriented JSON, it's just a simple dictionary that needs no transformation
-            return [data]
+        return list(self.iter_jsonl(file))
+
+    # Streaming File Readers
+    def iter_lines(self, file):
+        mapped_file = self.map_file(file)
+        if mapped_file is None:
+            # Decode the upload line by line instead of reading it into one string
+            yield from codecs.iterdecode(file, 'utf-8')
+            return
+
+        # Scan for line breaks in the mapped bytes, only the current record is copied and decoded.
+        # \r\n, \r and \n all end a line, as when Django's File iterates an upload kept in memory
+        with mapped_file:
+            start = getattr(file, 'file', file).tell()
+            size = len(mapped_file)
+            has_carriage_returns = mapped_file.find(b'\r', start) != -1
+            while start < size:
+                if has_carriage_returns:
+                    line_break = self.line_break.search(mapped_file, start)
+                    end = size if line_break is None else line_break.end()
+                else:
+                    end = mapped_file.find(b'\n', start)
+                    end = size if end == -1 else end + 1
+                yield mapped_file[start:end].decode('utf-8')
+                start = end
+
+    def map_file(self, file):
+        # Uploads spilled to a temporary file, and files opened from disk, can be memory-mapped
+        binary = getattr(file, 'file', file)
+        try:
+            fileno = binary.fileno()
+        except (AttributeError, OSError):
+            return None
+
+        if os.fstat(fileno).st_size == 0:
+            return None
+        return mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+
+    def iter_txt(self, file):
+        for line in self.iter_lines(file):
+            if line.strip():
+                yield {"text": line.strip()}
+
+    def iter_jsonl(self, file):
+        for line in self.iter_lines(file):
+            if line.strip():
+                yield json.loads(line)
+
+    @contextmanager
+    def open_text(self, file):
+        # Decode the underlying binary stream in place instead of copying it into a StringIO
+        binary = getattr(file, 'file', file)
+        text = io.TextIOWrapper(binary, encoding=self.detect_encoding(binary))
+        try:
+            yield text
+        finally:
+            # Detach so that closing the wrapper never closes the upload itself
+            text.detach()
+
+    def detect_encoding(self, binary):
+        # UTF-8 with or without a BOM, UTF-16 or UTF-32, as json.load accepts them
+        if not binary.seekable():
+            return 'utf-8'
+        start = binary.tell()
+        head = binary.read(4)
+        binary.seek(start)
+        return json.detect_encoding(head)
+
+    def iter_conllu(self, file, tokens=True):
+        has_sentences = False
+
+        with self.open_text(file) as data:
+            for token_list in parse_incr(data):
+                words = []
+                tokens_data = []
+                metadata = token_list.metadata
+                sentiment_label = metadata.get("sentiment_label", None)
+
+                for token in token_list:
+                    if tokens:
+                        tokens_data.append({
+                            "id": token.get("id"),
+                            "form": token.get("form"),
+                            "lemma": token.get("lemma"),
+                            "upostag": token.get("upostag"),
+                            "xpostag": token.get("xpostag"),
+                            "feats": token.get("feats"),
+                            "head": token.get("head"),
+                            "deprel": token.get("deprel"),
+                            "deps": token.get("deps"),
+                            "misc": token.get("misc"),
+                        })
+
+                    form = token["form"]
+                    misc = token.get("misc")
+                    words.append(form)
+                    if misc is None or misc.get("SpaceAfter") != "No":
+                        words.append(" ")
+
+                sentence = "".join(words).strip()
+                if sentence:
+                    text = {"text": sentence}
+                    if tokens:
+                        text["tokens"] = tokens_data
+                    if sentiment_label:
+                        text["label"] = sentiment_label
+                    has_sentences = True
+                    yield text
+
+        if not has_sentences:
+            raise ValueError("The file is empty")
 
-        # Case 2: If the data has a top-level "data" key, extract the list
-        if isinstance(data, dict):
-            for key, value in data.items():
-                if isinstance(value, list):
-                    return value
+    def iter_json(self, file, chunk_size=65536):
+        with self.open_text(file) as data:
+            buffer = ""
+            while not buffer:
+                chunk = data.read(chunk_size)
+                if not chunk:
+                    raise ValueError("The file is empty")
+                buffer = chunk.lstrip()
+
+            # Case 1: top-level array, decoded one record at a time
+            if buffer.startswith("["):
+                yield from self.iter_json_array(data, buffer[1:], chunk_size)
+                return
+
+            # Case 2: {"data": [{...}, ...]} wrapper, its records are decoded one at a time the same way
+            while len(buffer) < 64 and (chunk := data.read(chunk_size)):
+                buffer += chunk
+            wrapper = self.json_wrapper.match(buffer)
+            if wrapper and buffer[wrapper.end():].lstrip().startswith("{"):
+                for record in self.iter_json_array(data, buffer[wrapper.end():], chunk_size, suffix="}"):
+                    if not isinstance(record, dict):
+                        raise ValueError('Every record under "data" must be an object')
+                    yield record
+                return
+
+            # A whole row needs a value from every column, so the other objects are still parsed in one go
+            content = json.loads(buffer + data.read())
+
+        if isinstance(content, dict):
+            records = content.get("data")
+            if len(content) == 1 and isinstance(records, list) and all(isinstance(item, dict) for item in records):
+                yield from records
+
+            # Case 3: column-oriented JSON (keys are arrays), rows are built lazily from the columns
+            elif all(isinstance(value, list) for value in content.values()):
+                max_length = max((len(value) for value in content.values()), default=0)
+                for index in range(max_length):
+                    yield {key: value[index] if index < len(value) else "" for key, value in content.items()}
 
-        if isinstance(data, list):
-            return data
+            # If not a column-oriented JSON, it's just a simple dictionary that needs no transformation
+            else:
+                yield content
+            return
 
         raise ValueError("Unsupported JSON format")
 
-    def read_csv(self, file):
-        content = file.read().decode('utf-8')
-        delimiter = csv.Sniffer().sniff(content.splitlines()[0]).delimiter
-        csv_reader = csv.DictReader(content.splitlines(), delimiter=delimiter)
-        data = []
+    def iter_json_array(self, data, buffer, chunk_size, suffix=""):
+        decoder = json.JSONDecoder()
+        index = 0
+        first = True
+        expect_value = True
+
+        while True:
+            while index < len(buffer) and buffer[index].isspace():
+                index += 1
+
+            if index < len(buffer) and buffer[index] == "]" and not (expect_value and not first):
+                # Only the suffix (the wrapper's closing brace) and whitespace may follow the closing bracket
+                rest = buffer[index + 1:].strip()
+                while len(rest) <= len(suffix) and (chunk := data.read(chunk_size)):
+                    rest = (rest + chunk).strip()
+                if rest != suffix:
+                    raise json.JSONDecodeError("Extra data", buffer, index + 1)
+                return
+
+            if index < len(buffer) and not expect_value:
+                if buffer[index] != ",":
+                    raise json.JSONDecodeError("Expecting ',' delimiter", buffer, index)
+                index += 1
+                expect_value = True
+                first = False
+                continue
 
-        for row in csv_reader:
-            reconstructed_row = defaultdict(dict)
-
-            for key, value in row.items():
-                if value is not None:
-                    value = value.strip()
-                    if value.isdigit():
-                        value = int(value)
-                    elif value.replace('.', '', 1).isdigit():
-                        value = float(value)
-
-                # Reconstruct nested structures
-                keys = key.split('/')
-                temp = reconstructed_row
-                for part in keys[:-1]:
-                    temp = temp.setdefault(part, {})
-                temp[keys[-1]] = value
-
-            def process_lists(obj):
-                if isinstance(obj, dict):
-                    keys = list(obj.keys())
-                    if all(k.isdigit() for k in keys):
-                        return [process_lists(obj[k]) for k in sorted(obj, key=int)]
+            try:
+                item, end = decoder.raw_decode(buffer, index) if index < len(buffer) else (None, index)
+            except json.JSONDecodeError as e:
+                # Only an error near the end of the buffer, or an open string, can come from a record cut at the
+                # chunk boundary, anything else is a syntax error and is raised without reading further
+                if e.pos < len(buffer) - self.json_boundary and not e.msg.startswith("Unterminated string"):
+                    raise
+                end = len(buffer)
+
+            # The record may continue in the next chunk (e.g. a number cut at the buffer boundary)
+            if end > len(buffer) - self.json_boundary:
+                # Grow the read size with the pending record so large records are not re-decoded per chunk
+                chunk = data.read(max(chunk_size, len(buffer) - index))
+                if not chunk:
+                    if index < len(buffer):
+                        item, end = decoder.raw_decode(buffer, index)
                     else:
-                        return {k: process_lists(v) for k, v in obj.items()}
-                return obj
+                        raise json.JSONDecodeError("Unterminated array", buffer, index)
+                else:
+                    buffer = buffer[index:] + chunk
+                    index = 0
+                    continue
 
-            data.append(process_lists(reconstructed_row))
+            yield item
+            index = end
+            expect_value = False
 
-        if not data:
+    def iter_csv(self, file, converters=None):
+        lines = self.iter_lines(file)
+        first_line = next(lines, None)
+        if first_line is None:
             raise ValueError("The file is empty")
 
-        return data
+        # Only the header line is sniffed, the rest of the file is read lazily
+        delimiter = csv.Sniffer().sniff(first_line).delimiter
+        csv_reader = csv.reader(chain([first_line], lines), delimiter=delimiter)
+        headers = next(csv_reader)
 
-    def read_conllu(self, file):
-        data = io.StringIO(file.read().decode("utf-8"))
-        sentences = []
-
-        for token_list in parse_incr(data):
-            words = []
-            tokens_data = []
-            metadata = token_list.metadata
-            sentiment_label = metadata.get("sentiment_label", None)
-
-            for token in token_list:
-                token_data = {
-                    "id": token.get("id"),
-                    "form": token.get("form"),
-                    "lemma": token.get("lemma"),
-                    "upostag": token.get("upostag"),
-                    "xpostag": token.get("xpostag"),
-                    "feats": token.get("feats"),
-                    "head": token.get("head"),
-                    "deprel": token.get("deprel"),
-                    "deps": token.get("deps"),
-                    "misc": token.get("misc"),
-                }
-                tokens_data.append(token_data)
-
-                form = token["form"]
-                misc = token.get("misc")
-                words.append(form)
-                if misc is None or misc.get("SpaceAfter") != "No":
-                    words.append(" ")
-
-            sentence = "".join(words).strip()
-            if sentence:
-                text = {"text": sentence,
-                        "tokens": tokens_data}
-                if sentiment_label:
-                    text["label"] = sentiment_label
-                sentences.append(text)
-
-
-        if not sentences:
+        # Compile the header once: nested key paths and a converter per column
+        build_row = self.compile_csv_headers(headers)
+        converters = converters or {}
+        column_converters = [converters.get(header, self.convert_csv_value) for header in headers]
+        padding = [None] * len(headers)
+
+        has_rows = False
+        for row in csv_reader:
+            if not row:
+                continue
+            values = [convert(value) for convert, value in zip(column_converters, row)]
+            values.extend(padding[len(values):])
+            has_rows = True
+            yield build_row(values)
+
+        if not has_rows:
             raise ValueError("The file is empty")
 
-        return sentences
+    def convert_csv_value(self, value):
+        value = value.strip()
+        if value.isdigit():
+            return int(value)
+        elif value.replace('.', '', 1).isdigit():
+            return float(value)
+        return value
+
+    def compile_csv_headers(self, headers):
+        # Reconstruct nested structures from "parent/child" headers, "parent/0" headers become lists
+        tree = {}
+        for column, header in enumerate(headers):
+            keys = header.split('/')
+            node = tree
+            for part in keys[:-1]:
+                node = node.setdefault(part, {})
+            node[keys[-1]] = column
+
+        def compile_node(node):
+            if isinstance(node, int):
+                return itemgetter(node)
+
+            children = [(key, compile_node(child)) for key, child in node.items()]
+            if all(key.isdigit() for key in node):
+                children.sort(key=lambda child: int(child[0]))
+                return lambda values: [build(values) for _, build in children]
+            return lambda values: {key: build(values) for key, build in children}
+
+        return compile_node(tree)
+
+    def read_json(self, file):
+        return list(self.iter_json(file))
+
+    def read_csv(self, file):
+        return list(self.iter_csv(file))
+
+    def read_conllu(self, file):
+        return list(self.iter_conllu(file))
 
     # File Generator
-    def to_json(self, content):
-        if not content:
-            raise ValueError("The exported file is empty")
+    def stream(self, content, export_as, sequential=False):
+        stream_method = getattr(self, f"stream_{export_as}", None)
+        if not callable(stream_method):
+            raise ValueError(f"Unsupported export format: {export_as}")
+
+        if export_as == "csv":
+            return self.buffer_chunks(stream_method(content, sequential))
+
+        return self.buffer_chunks(stream_method(content))
+
+    def buffer_chunks(self, chunks):
+        buffer = []
+        size = 0
+        for chunk in chunks:
+            buffer.append(chunk)
+            size += len(chunk)
+            if size >= self.stream_buffer_size:
+                yield b"".join(buffer)
+                buffer = []
+                size = 0
 
-        return json.dumps(content, indent=2).encode('utf-8')
+        if buffer:
+            yield b"".join(buffer)
+
+    def to_json(self, content):
+        return b"".join(self.stream_json(content))
 
     def to_jsonl(self, content):
-        if not content:
+        return b"".join(self.stream_jsonl(content))
+
+    def to_csv(self, content, sequential=False):
+        return b"".join(self.stream_csv(content, sequential))
+
+    def to_conllu(self, content):
+        return b"".join(self.stream_conllu(content))
+
+    def gzip_stream(self, chunks, level=6):
+        # Compress chunk by chunk as they are produced, wbits=31 writes the gzip header and trailer
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            if data := compressor.compress(chunk):
+                yield data
+        yield compressor.flush()
+
+    # Streaming writers, an empty export raises on the first next()
+    def stream_json(self, content):
+        separator = b"[\n"
+        for item in content:
+            yield separator + json.dumps(item).encode('utf-8')
+            separator = b",\n"
+
+        if separator == b"[\n":
             raise ValueError("The exported file is empty")
 
-        return "\n".join(json.dumps(item) for item in content).encode('utf-8')
+        yield b"\n]"
 
-    def to_csv(self, content, sequential=False):
-        print(content)
-        def flatten_json(json_obj, parent_key='', sep='/'):
-            items = []
-            if isinstance(json_obj, list):
-                # if all (isinstance(value, dict) for value in json_obj):
-                #     for value in json_obj:
-                #         items.extend(flatten_json(value, parent_key).items())
-                # else:
-                if len(json_obj) == 0:  # Handle empty lists
-                    items.append((parent_key, ''))
-                else:
-                    for i, value in enumerate(json_obj):
-                        items.extend(flatten_json(value, f"{parent_key}{sep}{i}").items())
-            elif isinstance(json_obj, dict):
-                for key, value in json_obj.items():
-                    new_key = f"{parent_key}{sep}{key}" if parent_key else key
-                    if isinstance(value, (dict, list)):
-                        items.extend(flatten_json(value, new_key, sep=sep).items())
-                    else:
-                        items.append((new_key, value if value is not None else ''))
-            else:
-                items.append((parent_key, json_obj if json_obj is not None else ''))
-            return dict(items)
+    def stream_jsonl(self, content):
+        separator = b""
+        for item in content:
+            yield separator + json.dumps(item).encode('utf-8')
+            separator = b"\n"
+
+        if not separator:
+            raise ValueError("The exported file is empty")
 
-        headers = []
-        flattened_content = []
+    def stream_csv(self, content, sequential=False):
+        # Pseudo-buffer so csv.writer hands back each formatted row
+        class Echo:
+            def write(self, value):
+                return value
 
         # For sequence labelling export
         if sequential:
+            csv_writer = csv.DictWriter(Echo(), fieldnames=["Sentence", "Word", "Label"])
             sentence_count = 1
-            # print(content)
-            # headers = content[0].keys()
-            # flattened_content = content
+            empty = True
+            aligner = TokenAligner()
             for line_number, document in enumerate(content, start=1):
-                text = document.get("text", "")
-                labels = sorted(document.get("label", None), key=lambda x: (x[0], x[1]))
-                tokens = []
-                idx = 0
-
-                prev_end = -1
-
-                for label in labels:
-                    start, end, label_name = label
-
-                    if start < 0 or end > len(text):
-                        raise ValueError(f"Line {line_number} label index out of bounds")
-
-                    if start != (prev_end + 1):
-                        segment = text[prev_end + 1: start]
-                        prev_end = start - 1
-                        idx, tokens = self.add_tokens(idx, tokens, segment)
-
-                    word = text[start:end + 1] if (start == end) else text[start:end]
-                    prev_end = end
-                    idx, token = self.create_token(idx, word, label_name)
-                    tokens.append(token)
-
-                if prev_end != len(text) - 1:
-                    segment = text[prev_end + 1: len(text)]
-                    idx, tokens = self.add_tokens(idx, tokens, segment)
-
-                first_token = True
-                for token in tokens:
-                    flattened_content.append({
-                        "Sentence": f"Sentence: {sentence_count}" if first_token else "",
-                        "Word": token["form"],
-                        "Label": token["upostag"]
-                    })
-                    first_token = False
+                forms, label_ids = aligner.align(document.get("text", ""), document.get("label", None),
+                                                 strict=True, line_number=line_number)
+
+                if forms:
+                    rows = [csv_writer.writeheader()] if empty else []
+                    for position, (form, label_name) in enumerate(zip(forms, aligner.labels(label_ids))):
+                        rows.append(csv_writer.writerow({
+                            "Sentence": f"Sentence: {sentence_count}" if position == 0 else "",
+                            "Word": form,
+                            "Label": label_name
+                        }))
+                    empty = False
+                    yield "".join(rows).encode('utf-8')
                 sentence_count += 1
 
-            headers = ["Sentence", "Word", "Label"]
+            if empty:
+                raise ValueError("The exported file is empty")
 
-        # Other case
+        # Other case, nested records are flattened to one column per leaf
         else:
-            flattened_content = [flatten_json(item) for item in content]
-
-            for item in flattened_content:
-                for key in item.keys():
-                    if key not in headers:
-                        headers.append(key)
-
-        if not flattened_content:
-            raise ValueError("The exported file is empty")
-
-        output = StringIO()
-        csv_writer = csv.DictWriter(output, fieldnames=headers)
-        csv_writer.writeheader()
-        csv_writer.writerows(flattened_content)
-
-        return output.getvalue().encode('utf-8')
-
-
-    def to_conllu(self, content):
-        serialized_sentences = []
+            rows, headers = self.flatten_rows(content)
+            rows = iter(rows)
+            first_row = next(rows, None)
+            if first_row is None:
+                raise ValueError("The exported file is empty")
+
+            csv_writer = csv.DictWriter(Echo(), fieldnames=headers)
+            yield csv_writer.writeheader().encode('utf-8')
+            rows = chain([first_row], rows)
+            while chunk := list(islice(rows, 1000)):
+                yield "".join(csv_writer.writerow(row) for row in chunk).encode('utf-8')
+
+    def flatten_json(self, json_obj, parent_key='', sep='/'):
+        # (column, value) pairs of one record, nested keys are joined with sep and list items keyed by index
+        if isinstance(json_obj, list):
+            if not json_obj:
+                yield parent_key, ''
+            for i, value in enumerate(json_obj):
+                yield from self.flatten_json(value, f"{parent_key}{sep}{i}", sep)
+        elif isinstance(json_obj, dict):
+            for key, value in json_obj.items():
+                new_key = f"{parent_key}{sep}{key}" if parent_key else key
+                if isinstance(value, (dict, list)):
+                    yield from self.flatten_json(value, new_key, sep)
+                else:
+                    yield new_key, value if value is not None else ''
+        else:
+            yield parent_key, json_obj if json_obj is not None else ''
+
+    def flatten_rows(self, content):
+        # The header row needs every column before the first row is written, columns keep first-seen order
+        headers = {}
+        if isinstance(content, (list, tuple)):
+            # Already in memory, a first pass collects the columns and the rows are flattened again while writing
+            for item in content:
+                headers.update(dict.fromkeys(key for key, _ in self.flatten_json(item)))
+            return (dict(self.flatten_json(item)) for item in content), list(headers)
+
+        # One-shot iterables: keep a bounded sample in memory, larger inputs spill flattened rows to disk
+        items = iter(content)
+        sample = [dict(self.flatten_json(item)) for item in islice(items, self.csv_sample_size)]
+        for row in sample:
+            headers.update(dict.fromkeys(row))
+
+        spill = None
+        for item in items:
+            if spill is None:
+                spill = tempfile.TemporaryFile('w+', encoding='utf-8')
+                spill.writelines(json.dumps(row) + "\n" for row in sample)
+                sample = None
+            row = dict(self.flatten_json(item))
+            headers.update(dict.fromkeys(row))
+            spill.write(json.dumps(row) + "\n")
+
+        if spill is None:
+            return sample, list(headers)
+
+        spill.seek(0)
+        return self.read_spill(spill), list(headers)
+
+    def read_spill(self, spill):
+        with spill:
+            for line in spill:
+                yield json.loads(line)
+
+    def stream_conllu(self, content):
+        aligner = TokenAligner()
+        empty = True
 
         for line_number, document in enumerate(content, start=1):
             tokens = []
@@ -297,29 +552,10 @@ class FileProcessor:
                         tokens.append(token)
 
                 elif isinstance(labels, list):
-
-                    labels = sorted(labels, key=lambda x: (x[0], x[1]))
-                    prev_end = -1
-
-                    for label in labels:
-                        start, end, label_name = label
-
-                        if start < 0 or end > len(text):
-                            raise ValueError(f"Line {line_number} label index out of bounds")
-
-                        if start != (prev_end + 1):
-                            segment = text[prev_end + 1: start]
-                            prev_end = start - 1
-                            idx, tokens = self.add_tokens(idx, tokens, segment)
-
-                        word = text[start:end + 1] if (start == end) else text[start:end]
-                        prev_end = end
-                        idx, token = self.create_token(idx, word, label_name)
+                    forms, label_ids = aligner.align(text, labels, strict=True, line_number=line_number)
+                    for form, label_name in zip(forms, aligner.labels(label_ids)):
+                        idx, token = self.create_token(idx, form, label_name)
                         tokens.append(token)
-
-                    if prev_end != len(text) - 1:
-                        segment = text[prev_end + 1: len(text)]
-                        idx, tokens = self.add_tokens(idx, tokens, segment)
                 else:
                     for word in text.split():
                         idx, token = self.create_token(idx, word, "_")
@@ -331,12 +567,75 @@ class FileProcessor:
                 # raise ValueError(f"Line {line_number} missing required keys 'text' or 'token'")
 
             sentence = TokenList(tokens, metadata=Metadata(metadata))
-            serialized_sentences.append(sentence.serialize())
+            empty = False
+            yield sentence.serialize().encode("utf-8")
 
-        if not serialized_sentences:
+        if empty:
             raise ValueError("The exported file is empty")
 
-        return "".join(serialized_sentences).encode("utf-8")
+    def stream_npz(self, content, labels=()):
+        # Columnar training export: token and label ids, document boundaries and the lookup tables,
+        # stored uncompressed like np.savez so each member can be memory-mapped
+        class Buffer:
+            def __init__(self):
+                self.chunks = []
+
+            def write(self, data):
+                self.chunks.append(bytes(data))
+                return len(data)
+
+            def flush(self):
+                pass
+
+            def take(self):
+                data = b"".join(self.chunks)
+                self.chunks = []
+                return data
+
+        aligner = TokenAligner(labels)
+        vocabulary = {}
+        token_ids = array('i')
+        label_ids = array('h')
+        offsets = array('q', [0])
+
+        for line_number, document in enumerate(content, start=1):
+            if "token" in document and "labels" in document:
+                forms = document["token"]
+                document_label_ids = [aligner.label_id(label) for label in document["labels"]]
+            else:
+                forms, document_label_ids = aligner.align(document.get("text", ""), document.get("label") or [],
+                                                          strict=True, line_number=line_number)
+
+            token_ids.extend(vocabulary.setdefault(form, len(vocabulary)) for form in forms)
+            # The aligner returns int32 ids, which array('h').extend only takes from a list
+            label_ids.fromlist(list(document_label_ids))
+            offsets.append(len(token_ids))
+
+        if len(offsets) == 1:
+            raise ValueError("The exported file is empty")
+
+        # Token i is vocab[vocab_offsets[i]:vocab_offsets[i + 1]] decoded as UTF-8, a fixed-width str array
+        # would pad every entry to the longest token
+        forms = [form.encode('utf-8') for form in vocabulary]
+        vocab_offsets = array('q', [0])
+        vocab_offsets.extend(accumulate(len(form) for form in forms))
+
+        arrays = {
+            "vocab": np.frombuffer(b"".join(forms), dtype=np.uint8),
+            "vocab_offsets": np.frombuffer(vocab_offsets, dtype=np.longlong).astype('<i8', copy=False),
+            "token_ids": np.frombuffer(token_ids, dtype=np.intc).astype('<i4', copy=False),
+            "label_ids": np.frombuffer(label_ids, dtype=np.short).astype('<i2', copy=False),
+            "offsets": np.frombuffer(offsets, dtype=np.longlong).astype('<i8', copy=False),
+            "labels": np.array(aligner.label_names, dtype=str),
+        }
+
+        output = Buffer()
+        with zipfile.ZipFile(output, mode='w', compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+            for name, value in arrays.items():
+                with archive.open(f"{name}.npy", 'w', force_zip64=True) as member:
+                    np.lib.format.write_array(member, value, allow_pickle=False)
+                yield output.take()
+        yield output.take()
 
     def create_token(self, idx, word, token_label, lemma="_", xpostag="_", feats="_", head=0, deprel="_", deps="_", misc="_"):
         token = {
@@ -353,13 +652,3 @@ class FileProcessor:
         }
         idx += 1
         return idx, token
-
-    def add_tokens(self, idx, tokens, segment, token_label="_"):
-        for word in segment.split():
-            idx, token = self.create_token(idx, word, token_label)
-            tokens.append(token)
-
-        return idx, tokens
-
-
-
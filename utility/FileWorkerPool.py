@@ -0,0 +1,73 @@
+import io
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+import django
+from django.conf import settings
+from django.core.files import File
+
+
+class FileWorkerPool:
+    """
+    Runs a CPU-bound function for each uploaded file in a pool of worker processes.
+    Results are yielded in upload order, so the caller can consume them as a single ordered stream.
+    """
+
+    # Spawning workers takes a few seconds, small uploads are faster to process in the request itself
+    min_total_size = 16 * 1024 * 1024
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or settings.FILE_PROCESSING_WORKERS
+
+    def is_parallel(self, files):
+        if self.max_workers <= 1 or len(files) <= 1:
+            return False
+        return sum(getattr(file, 'size', 0) or 0 for file in files) >= self.min_total_size
+
+    def map(self, function, files, *args):
+        if not self.is_parallel(files):
+            for file in files:
+                yield function(file.name, file, *args)
+            return
+
+        # Spawned workers do not inherit the parent's database connections
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context, initializer=django.setup) as executor:
+            pending = deque()
+            for file in files:
+                pending.append(executor.submit(function, file.name, self.source(file), *args))
+                # Bound the number of finished results waiting to be consumed
+                if len(pending) >= self.max_workers * 2:
+                    yield pending.popleft().result()
+
+            while pending:
+                yield pending.popleft().result()
+
+    @staticmethod
+    def source(file):
+        # Files already on disk are reopened by path in the worker, in-memory uploads are sent as bytes
+        if hasattr(file, 'temporary_file_path'):
+            return file.temporary_file_path()
+
+        path = getattr(getattr(file, 'file', None), 'name', None)
+        if isinstance(path, str) and os.path.isfile(path):
+            return path
+
+        file.seek(0)
+        return file.read()
+
+    @staticmethod
+    @contextmanager
+    def open(name, source):
+        # Only close what was opened here, files handed over by the serial path belong to the caller
+        if isinstance(source, bytes):
+            with File(io.BytesIO(source), name=name) as file:
+                yield file
+        elif isinstance(source, str):
+            with File(open(source, 'rb'), name=name) as file:
+                yield file
+        else:
+            yield source
@@ -0,0 +1,57 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class MinHash:
+    """
+    MinHash signatures over character shingles, with banded LSH bucket keys.
+    Every step is vectorized with NumPy, so a signature costs O(len(text) * num_perm) without Python loops.
+    """
+
+    # Mersenne prime 2^31 - 1, keeps (a * h + b) below 2^63 for 32-bit shingle hashes
+    prime = np.uint64((1 << 31) - 1)
+    # Shingles hashed together in one signature step
+    block_size = 2048
+
+    def __init__(self, num_perm=128, bands=16, shingle_size=5, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, self.prime, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, self.prime, size=num_perm, dtype=np.uint64)
+        self.shingle_weights = np.uint64(31) ** np.arange(shingle_size, dtype=np.uint64)
+        self.band_weights = rng.integers(1, 1 << 62, size=num_perm // bands, dtype=np.uint64)
+        self.band_offsets = np.arange(bands, dtype=np.uint64) << np.uint64(56)
+
+    def shingles(self, text):
+        data = np.frombuffer(" ".join(text.lower().split()).encode('utf-8'), dtype=np.uint8)
+        if len(data) < self.shingle_size:
+            data = np.pad(data, (0, self.shingle_size - len(data)))
+
+        # Polynomial hash of every window of shingle_size bytes, reduced to 32 bits
+        windows = sliding_window_view(data, self.shingle_size).astype(np.uint64)
+        return np.unique((windows @ self.shingle_weights) & np.uint64(0xFFFFFFFF))
+
+    def signature(self, text):
+        shingles = self.shingles(text)
+        # All permutations at once, over blocks of shingles so a long text never builds the full
+        # (shingles x num_perm) matrix, the minimum per permutation is carried across blocks
+        signature = np.full(self.num_perm, self.prime, dtype=np.uint64)
+        for start in range(0, len(shingles), self.block_size):
+            block = shingles[start:start + self.block_size]
+            np.minimum(signature, ((np.outer(block, self.a) + self.b) % self.prime).min(axis=0), out=signature)
+        return signature.astype(np.uint32)
+
+    def buckets(self, signature):
+        # One key per band, the band number is mixed in so equal rows in different bands do not collide
+        rows = signature.astype(np.uint64).reshape(self.bands, -1)
+        keys = (rows * self.band_weights).sum(axis=1) ^ self.band_offsets
+        return keys.view(np.int64).tolist()
+
+    def similarity(self, signature, other):
+        return np.count_nonzero(signature == other) / self.num_perm
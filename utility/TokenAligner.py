@@ -0,0 +1,104 @@
+import re
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import chain
+from operator import itemgetter
+
+
+class TokenAligner:
+    """
+    Aligns [start, end, label] spans with the whitespace tokens of a text.
+    Each span becomes one token (text[start:end], or text[start:end + 1] when start == end) and the
+    text around the spans is split on whitespace with the "_" label, as the exports always did.
+    The sorted spans are merged with the text in one pass, each gap between spans is sliced and split once,
+    and the result is kept as parallel forms / label id arrays instead of a dict per token.
+    """
+
+    word = re.compile(r'\S+')
+
+    def __init__(self, labels=()):
+        self.label_names = ["_"]
+        self.label_ids = {"_": 0}
+        for label in labels:
+            self.label_id(label)
+
+    def label_id(self, name):
+        label_id = self.label_ids.get(name)
+        if label_id is None:
+            label_id = self.label_ids[name] = len(self.label_names)
+            self.label_names.append(name)
+        return label_id
+
+    def labels(self, label_ids):
+        return [self.label_names[label_id] for label_id in label_ids]
+
+    # Whitespace token offsets, packed as little-endian int32 (start, end) pairs
+    @classmethod
+    def pack_offsets(cls, text):
+        offsets = array('i', chain.from_iterable(match.span() for match in cls.word.finditer(text)))
+        if sys.byteorder == 'big':
+            offsets.byteswap()
+        return offsets.tobytes()
+
+    @staticmethod
+    def unpack_offsets(data):
+        offsets = array('i')
+        offsets.frombytes(data)
+        if sys.byteorder == 'big':
+            offsets.byteswap()
+        return offsets[0::2], offsets[1::2]
+
+    @staticmethod
+    def count_tokens(offsets, begin, stop):
+        # Same as len(text[begin:stop].split()) for non-negative bounds, without touching the text
+        starts, ends = offsets
+        if begin >= stop:
+            return 0
+        return max(0, bisect_left(starts, stop) - bisect_right(ends, begin))
+
+    def align(self, text, spans, strict=False, line_number=None):
+        forms = []
+        label_ids = array('i')
+        position = 0
+
+        for start, end, label in sorted(spans, key=itemgetter(0, 1)):
+            if strict and (start < 0 or end > len(text)):
+                raise ValueError(f"Line {line_number} label index out of bounds")
+
+            if start != position:
+                self.fill(text[position:start], forms, label_ids)
+                position = start
+
+            forms.append(text[start:end + 1] if start == end else text[start:end])
+            label_ids.append(self.label_id(label))
+            position = end + 1
+
+        if position < len(text):
+            self.fill(text[position:], forms, label_ids)
+
+        return forms, label_ids
+
+    def fill(self, segment, forms, label_ids):
+        # Unlabelled text between spans, split on whitespace with the "_" label
+        words = segment.split()
+        forms.extend(words)
+        label_ids.frombytes(bytes(label_ids.itemsize * len(words)))
+
+    def align_labels(self, offsets, length, spans):
+        # Label ids only, the unlabelled gaps are counted from the stored offsets
+        label_ids = array('i')
+        position = 0
+
+        for start, end, label in sorted(spans, key=itemgetter(0, 1)):
+            if start != position:
+                label_ids.frombytes(bytes(label_ids.itemsize * self.count_tokens(offsets, position, start)))
+                position = start
+
+            label_ids.append(self.label_id(label))
+            position = end + 1
+
+        if position < length:
+            label_ids.frombytes(bytes(label_ids.itemsize * self.count_tokens(offsets, position, length)))
+
+        return label_ids
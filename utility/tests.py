@@ -0,0 +1,218 @@
+import io
+import json
+import os
+import tempfile
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from utility.AtomicFile import AtomicFile
+from utility.FileProcessor import FileProcessor
+from utility.MinHash import MinHash
+
+
+class JsonArrayReaderTest(SimpleTestCase):
+
+    def read(self, text, chunk_size=65536, encoding='utf-8'):
+        return list(FileProcessor().iter_json(io.BytesIO(text.encode(encoding)), chunk_size=chunk_size))
+
+    def test_records_cut_at_every_chunk_boundary(self):
+        text = '[{"text": "caf\\u00e9 one"}, 12345, -Infinity, "a long string value", true, [1, 2.5e3], null]'
+        expected = json.loads(text)
+
+        for chunk_size in range(1, len(text) + 1):
+            self.assertEqual(json.dumps(self.read(text, chunk_size)), json.dumps(expected), chunk_size)
+
+    def test_empty_array_and_whitespace(self):
+        self.assertEqual(self.read('[]'), [])
+        self.assertEqual(self.read(' \n[ 1 ,\n 2 ]\n ', chunk_size=2), [1, 2])
+
+    def test_invalid_arrays_raise(self):
+        for text in ('[1,]', '[1 2]', '[,1]', '[1', '[1,', '[1] 2', '[1]]', '[{"a": }]'):
+            for chunk_size in (1, 3, 65536):
+                with self.assertRaises(json.JSONDecodeError, msg=(text, chunk_size)):
+                    self.read(text, chunk_size)
+
+    def test_syntax_error_is_raised_without_reading_the_rest(self):
+        text = '[{"text": "first"}, {"text": bad}, ' + ', '.join(['{"text": "next"}'] * 10000) + ']'
+        data = io.BytesIO(text.encode('utf-8'))
+        records = FileProcessor().iter_json(data, chunk_size=256)
+
+        self.assertEqual(next(records), {"text": "first"})
+        with self.assertRaises(json.JSONDecodeError):
+            next(records)
+        self.assertLess(data.tell(), len(text) // 10)
+
+    def test_byte_order_mark_and_utf16(self):
+        text = '[{"text": "caf\u00e9"}]'
+        for encoding in ('utf-8-sig', 'utf-16', 'utf-16-le', 'utf-32'):
+            self.assertEqual(self.read(text, encoding=encoding), [{"text": "caf\u00e9"}], encoding)
+
+    def test_data_wrapper_is_streamed(self):
+        text = '{ "data" : [' + ', '.join(['{"text": "next"}'] * 10000) + ', {"text": bad}]}'
+        data = io.BytesIO(text.encode('utf-8'))
+        records = FileProcessor().iter_json(data, chunk_size=256)
+
+        self.assertEqual(next(records), {"text": "next"})
+        self.assertLess(data.tell(), len(text) // 10)
+        with self.assertRaises(json.JSONDecodeError):
+            list(records)
+
+    def test_data_wrapper_shapes(self):
+        records = [{"text": "a"}, {"text": "b"}]
+        for chunk_size in (1, 7, 65536):
+            self.assertEqual(self.read(json.dumps({"data": records}) + "\n", chunk_size), records)
+        self.assertEqual(self.read('{"data": []}'), [])
+        # Anything but records under "data" is column-oriented
+        self.assertEqual(self.read('{"data": ["a", "b"]}'), [{"data": "a"}, {"data": "b"}])
+        self.assertEqual(self.read('{"text": ["a", "b"], "label": ["x"]}'),
+                         [{"text": "a", "label": "x"}, {"text": "b", "label": ""}])
+
+        for text in ('{"data": [{"text": "a"}, "b"]}', '{"data": [{"text": "a"}], "label": []}'):
+            with self.assertRaises(ValueError, msg=text):
+                self.read(text)
+
+
+class StreamWriterTest(SimpleTestCase):
+
+    def test_records_are_joined_into_buffer_sized_chunks(self):
+        records = [{"text": f"document {i}", "label": [[0, 8, "PER"]]} for i in range(5000)]
+
+        for export_as in ('json', 'jsonl', 'conllu'):
+            chunks = list(FileProcessor().stream(iter(records), export_as))
+
+            self.assertGreater(len(chunks), 1, export_as)
+            self.assertTrue(all(len(chunk) >= FileProcessor.stream_buffer_size for chunk in chunks[:-1]), export_as)
+            self.assertEqual(b"".join(chunks), FileProcessor().convert(records, export_as), export_as)
+
+    def test_empty_export_still_raises(self):
+        with self.assertRaises(ValueError):
+            next(FileProcessor().stream(iter([]), 'jsonl'))
+
+
+class StreamingConvertTest(SimpleTestCase):
+    inputs = {
+        'jsonl': b'{"text": "a b", "label": "x"}\n{"text": "c", "meta": {"k": [1]}}\n'
+                 b'{"text": "d e", "label": [[0, 1, "P"]]}\n',
+        'json': b'[{"text": "a b", "label": "x"}, {"text": "c"}, {"text": "q r"}]',
+        'csv': b'text,label,meta/0\na b,x,1\nc,,2\nd,y,3\n',
+        'conllu': b'# text = a b\n1\ta\ta\tX\t_\t_\t0\t_\t_\t_\n2\tb\tb\t_\t_\t_\t0\t_\t_\t_\n\n'
+                  b'# text = c\n1\tc\tc\t_\t_\t_\t0\t_\t_\t_\n\n',
+    }
+
+    def test_pipeline_matches_the_materialized_conversion(self):
+        processor = FileProcessor()
+        # A small sample makes the CSV writer spill the records it cannot hold
+        processor.csv_sample_size = 2
+        for file_format, content in self.inputs.items():
+            for export_as in ('json', 'jsonl', 'csv', 'conllu'):
+                expected = processor.convert(getattr(processor, f"read_{file_format}")(io.BytesIO(content)),
+                                             export_as)
+
+                converted = b"".join(processor.convert_file(io.BytesIO(content), file_format, export_as))
+
+                self.assertEqual(converted, expected, (file_format, export_as))
+
+    def test_records_are_written_before_the_input_is_read(self):
+        content = b''.join(b'{"text": "review %d"}\n' % i for i in range(50000)) + b'{not json\n'
+        chunks = FileProcessor().convert_file(io.BytesIO(content), 'jsonl', 'json')
+
+        self.assertTrue(next(chunks).startswith(b'[\n{"text": "review 0"}'))
+        with self.assertRaises(json.JSONDecodeError):
+            list(chunks)
+
+    def test_unknown_format_raises(self):
+        with self.assertRaises(ValueError):
+            FileProcessor().convert_file(io.BytesIO(b''), 'xml', 'json')
+
+
+class AtomicFileTest(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'nested', 'output.jsonl')
+
+    def test_file_is_moved_into_place_once_written(self):
+        with AtomicFile(self.path) as file:
+            file.write(b'partial')
+            self.assertFalse(os.path.exists(self.path))
+
+        with open(self.path, 'rb') as file:
+            self.assertEqual(file.read(), b'partial')
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ['output.jsonl'])
+
+    def test_failed_write_keeps_the_previous_file(self):
+        with AtomicFile(self.path) as file:
+            file.write(b'complete')
+
+        with self.assertRaises(RuntimeError):
+            with AtomicFile(self.path) as file:
+                file.write(b'trunc')
+                raise RuntimeError
+
+        with open(self.path, 'rb') as file:
+            self.assertEqual(file.read(), b'complete')
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), ['output.jsonl'])
+
+
+class NpzWriterTest(SimpleTestCase):
+
+    def test_npz_from_text_and_spans(self):
+        content = [
+            {"text": "John lives in Paris", "label": [[0, 4, "PER"], [14, 19, "LOC"]]},
+            {"text": "Paris", "token": ["Paris"], "labels": ["LOC"]},
+        ]
+        archive = np.load(io.BytesIO(b"".join(FileProcessor().stream_npz(content, labels=["PER", "LOC"]))))
+
+        vocab = self.vocab(archive)
+        self.assertEqual([vocab[token_id] for token_id in archive["token_ids"]],
+                         ["John", "lives", "in", "Paris", "Paris"])
+        self.assertEqual([archive["labels"][label_id] for label_id in archive["label_ids"]],
+                         ["PER", "_", "_", "LOC", "LOC"])
+        self.assertEqual(archive["offsets"].tolist(), [0, 4, 5])
+
+    def test_vocab_is_a_utf8_blob(self):
+        forms = ["a", "Zürich", "x" * 1000, "東京"]
+        archive = np.load(io.BytesIO(b"".join(FileProcessor().stream_npz([{"text": " ".join(forms)}]))))
+
+        self.assertEqual(archive["vocab"].dtype, np.uint8)
+        self.assertEqual(archive["vocab"].nbytes, sum(len(form.encode('utf-8')) for form in forms))
+        self.assertEqual(self.vocab(archive), forms)
+
+    def vocab(self, archive):
+        blob, offsets = archive["vocab"].tobytes(), archive["vocab_offsets"]
+        return [blob[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+class MinHashTest(SimpleTestCase):
+    text = ("The quarterly report shows that revenue grew by twelve percent while operating costs stayed flat "
+            "across every region we serve this year")
+
+    def setUp(self):
+        self.minhash = MinHash()
+
+    def similarity(self, text, other):
+        return self.minhash.similarity(self.minhash.signature(text), self.minhash.signature(other))
+
+    def test_similarity_follows_the_shared_shingles(self):
+        self.assertEqual(self.similarity(self.text, f"  {self.text.upper()} "), 1.0)
+        self.assertGreater(self.similarity(self.text, self.text.replace("twelve", "eleven")), 0.8)
+        self.assertLess(self.similarity(self.text, "Hiking in the mountains with friends on a rainy weekend"), 0.1)
+
+    def test_signature_is_deterministic(self):
+        signature = self.minhash.signature(self.text)
+
+        self.assertEqual(signature.dtype, np.uint32)
+        self.assertEqual(len(signature), 128)
+        self.assertTrue((MinHash().signature(self.text) == signature).all())
+        self.assertEqual(len(self.minhash.buckets(signature)), 16)
+
+    def test_long_text_is_signed_in_blocks(self):
+        words = [f"word{i}" for i in range(5000)]
+        text = " ".join(words)
+        blocked = MinHash()
+        blocked.block_size = 7
+
+        self.assertTrue((blocked.signature(text) == self.minhash.signature(text)).all())
+        self.assertTrue((blocked.signature("ab") == self.minhash.signature("ab")).all())